@@ -1,15 +1,25 @@
+"""
+Each subcommand imports only what it needs inside its own function, and
+names from 'src' are resolved lazily, so that e.g. 'generate' and
+requests to the agent never pay for 'models', 'io_' or 'pyperclip'.
+Guarded by 'benchmarks.startup'.
+"""
 import argparse
-from typing import Callable, Iterable, Optional
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO, Tuple
 
-import pyperclip
+from src import Help, Printer, Status
+from src.client import SOCKET, request
 
-from src import (IO, Group, Help, Key, KeyChain, ModePreset, PasswordGenerator,
-                 Printer, Status, User)
-
-print: Callable = Printer()
+print: Printer = Printer()
 
 
 def password_generate(mode: Optional[Iterable], unique: bool):
+    import pyperclip
+
+    from src.generator import PasswordGenerator
     try:
         generator = PasswordGenerator(mode)
     except ValueError:
@@ -20,6 +30,386 @@ def password_generate(mode: Optional[Iterable], unique: bool):
         print(Status.GENERATE_SUCCESS.value.format(password=password))
 
 
+def credentials(stream: TextIO = sys.stdout) -> Tuple[str, str]:
+    """
+    From $KEYCHAIN_USERNAME and $KEYCHAIN_PASSWORD if both are set, e.g.
+    when stdin carries batch commands, otherwise prompt on 'stream'.
+    """
+    from getpass import getpass
+    username = os.environ.get("KEYCHAIN_USERNAME")
+    password = os.environ.get("KEYCHAIN_PASSWORD")
+    if username is None or password is None:
+        stream.write("username: ")
+        stream.flush()
+        username = input()
+        password = getpass("password: ")  # On the tty, never stdout.
+    return username, password
+
+
+def vault_open(
+    file: Optional[str],
+    create: bool = False,
+    *,
+    stream: TextIO = sys.stdout
+) -> Optional[Tuple[Any, Any]]:
+    """
+    Return 'IO' and the decrypted 'KeyChain', or None on failure. If the
+    file does not exist, the keychain is empty if 'create' is True, i.e.
+    for commands adding keys, otherwise it is a failure.
+
+    Prompts and errors go to 'stream', e.g. stderr when stdout carries
+    responses of 'batch'.
+    """
+    from src.io_ import IO
+    from src.models import KeyChain
+    username, password = credentials(stream)
+    path = Path(file) if file is not None else Path.home()
+    io = IO(path, username, password)
+    if not io.path.exists():
+        if create:
+            return io, KeyChain()
+        print(Status.FILE_ERROR.value, file=stream)
+        return None
+    try:
+        result = io.read()
+    except OSError:
+        print(Status.FILE_ERROR.value, file=stream)
+        return None
+    if result.keychain is None:
+        print(result.status.value, file=stream)
+        return None
+    return io, result.keychain
+
+
+def vault_save(io: Any, keychain: Any) -> bool:
+    try:
+        status = io.write(keychain).status
+    except OSError:
+        status = Status.FILE_ERROR
+    if status != Status.SUCCESS:
+        print(status.value, file=sys.stderr, force_print=True)
+        return False
+    return True
+
+
+def vault_request(
+    file: Optional[str],
+    *,
+    create: bool = False,
+    **kwargs
+) -> Optional[dict]:
+    """
+    Same as 'agent_request', but against the file in this process, which
+    is saved if modified. See 'vault_open' for 'create'.
+    """
+    from src.batch import Batch
+    opened = vault_open(file, create)
+    if opened is None:
+        return None
+    io, keychain = opened
+    batch = Batch(keychain)
+    response = batch.dispatch(kwargs)
+    status = Status[response["status"]]
+    if status != Status.SUCCESS:
+        print(status.value)
+        return None
+    if batch.modified and not vault_save(io, keychain):
+        return None
+    return response
+
+
+def vault_batch(file: Optional[str], commands: TextIO):
+    """
+    Run newline-delimited json commands against one decrypted keychain,
+    streaming a json response per command, and save once at the end.
+    """
+    import json
+
+    from src.batch import Batch
+    opened = vault_open(file, create=True, stream=sys.stderr)
+    if opened is None:
+        return
+    io, keychain = opened
+    batch = Batch(keychain)
+    for _response in batch.run(commands):
+        # One line at a time, since a client may wait on each reply.
+        print(json.dumps(_response), flush=True, force_print=True)
+    if batch.modified and vault_save(io, keychain):
+        print(Status.SUCCESS.value, file=sys.stderr)
+
+
+def vault_memory(file: Optional[str]):
+    """
+    Peak and retained memory of reading the file, then the footprint of
+    the keychain by layer and by group.
+    """
+    from src.io_ import IO
+    username, password = credentials()
+    path = Path(file) if file is not None else Path.home()
+    try:
+        trace = IO(path, username, password).trace_read()
+    except OSError:
+        print(Status.FILE_ERROR.value)
+        return
+    keychain = trace.result.keychain
+    if keychain is None:
+        print(trace.result.status.value)
+        return
+    print(f"read: peak {trace.peak:,} bytes, retained {trace.retained:,}")
+    for _site, _size in trace.top:
+        print(f"    {_site}: {_size:,}")
+    print(keychain.memory_report().format())
+
+
+def agent_start(file: Optional[str], socket_: Path, timeout: float):
+    import asyncio
+
+    from src.agent import Agent
+    from src.io_ import IO
+    username, password = credentials()
+    path = Path(file) if file is not None else Path.home()
+    io = IO(path, username, password)
+    agent = Agent(io, socket_, timeout)
+    status = agent.unlock()
+    if status != Status.SUCCESS:
+        print(status.value)
+        return
+    try:
+        asyncio.run(agent.serve())
+    except FileExistsError:
+        print(Status.SOCKET_ERROR.value)
+
+
+def agent_request(socket_: Path, **kwargs) -> Optional[dict]:
+    try:
+        response = request(socket_, **kwargs)
+    except OSError:
+        print(Status.AGENT_ERROR.value)
+        return None
+    status = Status[response["status"]]
+    if status != Status.SUCCESS:
+        print(status.value)
+        return None
+    return response
+
+
+def lookup(file: Optional[str], socket_: Path, **kwargs) -> Optional[dict]:
+    """
+    Ask the agent if it is running and unlocked, otherwise read the file.
+    The agent is never asked if 'file' is given, since it may serve
+    another vault.
+    """
+    if file is not None:
+        return vault_request(file, **kwargs)
+    try:
+        response: Dict[str, Any] = request(socket_, **kwargs)
+    except OSError:
+        return vault_request(file, **kwargs)
+    status = Status[response["status"]]
+    if status == Status.LOCKED:
+        return vault_request(file, **kwargs)
+    if status != Status.SUCCESS:
+        print(status.value)
+        return None
+    return response
+
+
+def key_get(
+    pattern: str,
+    username: Optional[str],
+    file: Optional[str],
+    socket_: Path
+):
+    import pyperclip
+
+    response = lookup(file, socket_, op="get", pattern=pattern)
+    if response is None:
+        return
+    for _key in response["result"]:
+        for _user in _key["userlist"]:
+            if username is not None and _user["username"] != username:
+                continue
+            pyperclip.copy(_user["password"])
+            print(Status.COPY_SUCCESS.value.format(
+                username=_user["username"],
+                keyname=_key["keyname"]
+            ))
+            return
+    print(Status.NOT_FOUND.value)
+
+
+def format_key(key: dict) -> str:
+    usernames = ", ".join(i["username"] for i in key["userlist"])
+    return f"{key['group']}/{key['keyname']}: {usernames}"
+
+
+def key_search(
+    pattern: str,
+    regex_on: bool,
+    limit: Optional[int],
+    page_size: Optional[int],
+    file: Optional[str],
+    socket_: Path
+):
+    response = lookup(
+        file,
+        socket_,
+        op="search",
+        pattern=pattern,
+        regex_on=regex_on,
+        limit=limit
+    )
+    if response is None:
+        return
+    print.stream(response["result"], format_key, page_size=page_size)
+
+
+def key_add(
+    file: Optional[str],
+    keyname: str,
+    username: str,
+    group: str,
+    description: Optional[str],
+    url: Optional[str],
+    mode: Optional[str]
+):
+    from getpass import getpass
+    password: Optional[str] = None
+    if mode is None:
+        password = getpass(f"password of '{username}': ") or None
+    response = vault_request(
+        file,
+        create=True,
+        op="add",
+        keyname=keyname,
+        username=username,
+        password=password,
+        mode=mode,
+        group=group,
+        description=description,
+        url=url
+    )
+    if response is None:
+        return
+    if password is not None:
+        print(Status.SUCCESS.value)
+        return
+    import pyperclip
+    pyperclip.copy(response["result"])
+    print(Status.GENERATE_SUCCESS.value.format(password=response["result"]))
+
+
+def key_change(
+    file: Optional[str],
+    op: str,
+    group: str,
+    keyname: Optional[str]
+):
+    response = vault_request(file, op=op, group=group, keyname=keyname)
+    if response is not None:
+        print(Status.SUCCESS.value)
+
+
+def key_rotate(
+    file: Optional[str],
+    group: Optional[str],
+    mode: Optional[str],
+    unique: bool
+):
+    response = vault_request(
+        file,
+        op="rotate",
+        group=group,
+        mode=mode,
+        unique=unique
+    )
+    if response is None:
+        return
+    print.stream(response["result"], lambda i: f"{i[0]}/{i[1]}: {i[2]}")
+    print(Status.SUCCESS.value)
+
+
+def csv_import(file: Optional[str], path: str, group: str):
+    response = vault_request(
+        file,
+        create=True,
+        op="import",
+        path=path,
+        group=group
+    )
+    if response is not None:
+        print(Status.IMPORT_SUCCESS.value.format(count=response["result"]))
+
+
+def csv_export(file: Optional[str], path: str):
+    if vault_request(file, op="export", path=path) is not None:
+        print(Status.SUCCESS.value)
+
+
+def agent_lock(socket_: Path):
+    if agent_request(socket_, op="lock") is not None:
+        print(Status.SUCCESS.value)
+
+
+def profile(func: Callable, *args) -> None:
+    """
+    Run 'func' under 'cProfile', then print the top entries by cumulative
+    time to stderr.
+    """
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func, *args)
+    finally:
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+
+
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    if args.command == "agent":
+        agent_start(args.file, args.socket, args.timeout)
+    elif args.command == "get":
+        key_get(args.pattern, args.username, args.file, args.socket)
+    elif args.command == "search":
+        key_search(
+            args.pattern,
+            args.regex,
+            args.limit,
+            args.page,
+            args.file,
+            args.socket
+        )
+    elif args.command == "add":
+        key_add(
+            args.file,
+            args.keyname,
+            args.username,
+            args.group,
+            args.description,
+            args.url,
+            args.mode
+        )
+    elif args.command == "delete":
+        key_change(args.file, args.command, args.group, args.keyname)
+    elif args.command == "generate":
+        password_generate(args.mode, args.unique)
+    elif args.command == "import":
+        csv_import(args.file, args.path, args.group)
+    elif args.command == "export":
+        csv_export(args.file, args.path)
+    elif args.command == "rotate":
+        key_rotate(args.file, args.group, args.mode, args.unique)
+    elif args.command == "batch":
+        vault_batch(args.file, args.commands)
+    elif args.command == "memory":
+        vault_memory(args.file)
+    elif args.command == "lock":
+        agent_lock(args.socket)
+    else:
+        parser.print_help()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -27,6 +417,151 @@ def main():
         help=Help.FILE.value,
         metavar=""
     )
+    parser.add_argument(
+        "-s", "--socket",
+        type=Path,
+        default=SOCKET,
+        help=Help.SOCKET.value,
+        metavar=""
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help=Help.METRICS.value
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=Help.PROFILE.value
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    agent = subparsers.add_parser("agent", help=Help.AGENT.value)
+    agent.add_argument(
+        "-t", "--timeout",
+        type=float,
+        default=900.0,
+        help=Help.TIMEOUT.value,
+        metavar=""
+    )
+
+    get = subparsers.add_parser("get", help=Help.GET.value)
+    get.add_argument("pattern", help=Help.PATTERN.value)
+    get.add_argument(
+        "-u", "--username",
+        help=Help.USERNAME.value,
+        metavar=""
+    )
+
+    search = subparsers.add_parser("search", help=Help.SEARCH.value)
+    search.add_argument("pattern", help=Help.PATTERN.value)
+    search.add_argument(
+        "-r", "--regex",
+        action="store_true",
+        help=Help.REGEX.value
+    )
+    search.add_argument(
+        "-l", "--limit",
+        type=int,
+        help=Help.LIMIT.value,
+        metavar=""
+    )
+    search.add_argument(
+        "-p", "--page",
+        type=int,
+        help=Help.PAGE.value,
+        metavar=""
+    )
+
+    add = subparsers.add_parser("add", help=Help.ADD.value)
+    add.add_argument("keyname", help=Help.KEYNAME.value)
+    add.add_argument("username", help=Help.NEW_USERNAME.value)
+    add.add_argument(
+        "-g", "--group",
+        default="Default",
+        help=Help.GROUP.value,
+        metavar=""
+    )
+    add.add_argument(
+        "-d", "--description",
+        help=Help.KEY_DESCRIPTION.value,
+        metavar=""
+    )
+    add.add_argument(
+        "--url",
+        help=Help.URL.value,
+        metavar=""
+    )
+    add.add_argument(
+        "-m", "--mode",
+        help=Help.ADD_MODE.value,
+        metavar=""
+    )
+
+    delete = subparsers.add_parser("delete", help=Help.DELETE.value)
+    delete.add_argument("group", help=Help.GROUP.value)
+    delete.add_argument("keyname", nargs="?", help=Help.WHOLE_GROUP.value)
+
+    generate = subparsers.add_parser("generate", help=Help.GENERATE.value)
+    generate.add_argument("mode", nargs="?", help=Help.MODE.value)
+    generate.add_argument(
+        "-u", "--unique",
+        action="store_true",
+        help=Help.UNIQUE.value
+    )
+
+    import_ = subparsers.add_parser("import", help=Help.IMPORT.value)
+    import_.add_argument("path", help=Help.CSV.value)
+    import_.add_argument(
+        "-g", "--group",
+        default="Default",
+        help=Help.GROUP.value,
+        metavar=""
+    )
+
+    export = subparsers.add_parser("export", help=Help.EXPORT.value)
+    export.add_argument("path", help=Help.CSV.value)
+
+    rotate = subparsers.add_parser("rotate", help=Help.ROTATE.value)
+    rotate.add_argument(
+        "-g", "--group",
+        help=Help.ROTATE_GROUP.value,
+        metavar=""
+    )
+    rotate.add_argument(
+        "-m", "--mode",
+        help=Help.MODE.value,
+        metavar=""
+    )
+    rotate.add_argument(
+        "-u", "--unique",
+        action="store_true",
+        help=Help.UNIQUE.value
+    )
+
+    batch = subparsers.add_parser("batch", help=Help.BATCH.value)
+    batch.add_argument(
+        "commands",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+        help=Help.COMMANDS.value
+    )
+
+    subparsers.add_parser("memory", help=Help.MEMORY.value)
+
+    subparsers.add_parser("lock", help=Help.LOCK.value)
+
+    args = parser.parse_args()
+    if args.metrics:
+        from src.metrics import Metrics
+        Metrics().enable()
+    if args.profile:
+        profile(run, args, parser)
+    else:
+        run(args, parser)
+    if args.metrics:
+        print(Metrics().format(), file=sys.stderr, force_print=True)
 
 
 main()
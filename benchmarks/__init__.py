@@ -0,0 +1,10 @@
+"""
+Benchmarks, each run from the project root as 'python -m benchmarks.<name>':
+    suite         hot paths over a synthetic vault, saved as json
+    generator     throughput of 'PasswordGenerator'
+    contention    thread-safe 'KeyChain' under readers and writers
+    concurrency   stress of concurrent writers on one file
+    startup       startup time of the command line interface
+    cipher        legacy cipher against "shake256", and the kdf
+    bulk          'KeyChain.add_keys' against a loop of 'add_key'
+"""
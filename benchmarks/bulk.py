@@ -0,0 +1,80 @@
+"""
+'KeyChain.add_keys' against a loop of 'KeyChain.add_key': all keys of a
+synthetic vault into an empty keychain, and a batch of new keys into a
+populated one.
+
+Cached state, e.g. 'KeyChain.digest', is rebuilt lazily on the next read
+at the same cost either way, hence not timed. Keychain and keys are
+built anew for each repeat, and setup is never measured.
+
+Run from the project root:
+    >   python -m benchmarks.bulk
+"""
+import argparse
+from statistics import median
+from time import perf_counter
+from typing import Callable, List, Tuple
+
+from src import KeyChain, Key
+
+from .vault import Shape, synthetic
+
+
+def timeit(
+    setup: Callable[[], Tuple[KeyChain, List[Key]]],
+    func: Callable[[KeyChain, List[Key]], object],
+    repeat: int
+) -> float:
+    list_: List[float] = []
+    for _ in range(repeat):
+        _keychain, _keys = setup()
+        _start = perf_counter()
+        func(_keychain, _keys)
+        list_.append(perf_counter() - _start)
+    return median(list_)
+
+
+def loop(keychain: KeyChain, keys: List[Key]) -> None:
+    for _key in keys:
+        keychain.add_key(_key)
+
+
+def bulk(keychain: KeyChain, keys: List[Key]) -> None:
+    keychain.add_keys(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--keys", type=int, default=2500)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    shape = Shape(groups=args.groups, keys=args.keys)
+    string_ = synthetic(shape).to_json()
+
+    def empty() -> Tuple[KeyChain, List[Key]]:
+        return KeyChain(), synthetic(shape).get_all_keys()
+
+    def populated() -> Tuple[KeyChain, List[Key]]:
+        keys = synthetic(shape, seed=1).get_all_keys()[:args.batch]
+        for _key in keys:
+            _key.keyname = f"new-{_key.keyname}"
+        return KeyChain.from_json(string_), keys
+
+    runs = (
+        (f"{shape.size} keys into empty", empty),
+        (f"{args.batch} keys into {shape.size}", populated),
+    )
+    print(f"{'':<32}{'add_key':>12}{'add_keys':>12}")
+    for _name, _setup in runs:
+        _loop = timeit(_setup, loop, args.repeat)
+        _bulk = timeit(_setup, bulk, args.repeat)
+        print(f"{_name:<32}"
+              f"{_loop * 1000:>10.2f}ms{_bulk * 1000:>10.2f}ms"
+              f"{_loop / _bulk:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Legacy cipher, i.e. 'random' seeded by username and password, against
+"shake256": keystream and xor by payload size, key derivation alone, and
+'IO.read' and 'IO.write' of a synthetic vault end to end.
+
+The key derivation is slow by design. "shake256" is timed both with it
+paid on every read and write, i.e. 'IO.KDF_TTL' set to 0, and with keys
+cached, as after an unlock.
+
+Run from the project root:
+    >   python -m benchmarks.cipher
+"""
+import argparse
+import os
+import random
+import tempfile
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Callable, List
+
+from src import IO
+from src.io_ import (CIPHER, LEGACY, _credentials, _derive, _kdf_params,
+                     _keystream, _xor)
+
+from .vault import Shape, synthetic
+
+SIZES = (2 ** 16, 2 ** 20, 2 ** 24)  # bytes
+SEED = "username" + "password"
+
+
+def timeit(func: Callable[[], object], repeat: int) -> float:
+    list_: List[float] = []
+    for _ in range(repeat):
+        _start = perf_counter()
+        func()
+        list_.append(perf_counter() - _start)
+    return median(list_)
+
+
+def legacy(data: bytes) -> bytes:
+    random.seed(SEED, version=2)
+    return _xor(data, random.randbytes(len(data)))
+
+
+def shake256(data: bytes, key: bytes, nonce: str) -> bytes:
+    return _xor(data, _keystream(key, nonce, len(data)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--groups", type=int, default=Shape().groups)
+    parser.add_argument("--keys", type=int, default=Shape().keys)
+    args = parser.parse_args()
+
+    key, nonce = os.urandom(32), os.urandom(16).hex()
+    print(f"{'keystream + xor':<24}{LEGACY:>12}{CIPHER:>12}")
+    for _size in SIZES:
+        _data = os.urandom(_size)
+        _old = timeit(lambda: legacy(_data), args.repeat)
+        _new = timeit(lambda: shake256(_data, key, nonce), args.repeat)
+        print(f"{_size:>16,} bytes"
+              f"{_old * 1000:>10.2f}ms{_new * 1000:>10.2f}ms")
+
+    params = _kdf_params()
+    kdf = timeit(
+        lambda: _derive(_credentials("username", "password"), params),
+        args.repeat
+    )
+    print(f"\n{'kdf ' + params['kdf']:<24}{'-':>12}{kdf * 1000:>10.2f}ms")
+
+    keychain = synthetic(Shape(groups=args.groups, keys=args.keys))
+    print(f"\nIO, {args.groups * args.keys} keys")
+    ttl = IO.KDF_TTL
+    runs = ((LEGACY, ttl), (CIPHER, 0.0), (CIPHER, ttl))
+    with tempfile.TemporaryDirectory() as directory:
+        for i, (_cipher, _ttl) in enumerate(runs):
+            _path = Path(directory) / str(i)
+            _path.mkdir()
+            IO.KDF_TTL = _ttl
+            _io = IO(_path, "username", "password", cipher=_cipher)
+
+            def write() -> None:
+                _io.generation = None  # Never a conflict between repeats.
+                _io.write(keychain)
+
+            _write = timeit(write, args.repeat)
+            _read = timeit(_io.read, args.repeat)
+            _size = _io.path.stat().st_size
+            _name = _cipher if _ttl else f"{_cipher}, no cache"
+            print(f"{_name:<24}{_size:>12,} bytes"
+                  f"{_read * 1000:>10.2f}ms read"
+                  f"{_write * 1000:>10.2f}ms write")
+    IO.KDF_TTL = ttl
+
+
+if __name__ == "__main__":
+    main()
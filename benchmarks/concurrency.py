@@ -0,0 +1,64 @@
+"""
+Stress of concurrent read-modify-write cycles on one file.
+
+Every writer adds its own keys, retrying on conflict. No update may be lost.
+
+Run from the project root:
+    >   python -m benchmarks.concurrency
+"""
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Tuple
+
+from src import IO, KeyChain, Status
+
+WRITERS = 8
+UPDATES = 25
+
+
+def writer(path: Path, index: int) -> Tuple[int, int]:
+    """Return the numbers of updates and conflicts."""
+    io = IO(path, "username", "password")
+    conflicts = 0
+    for i in range(UPDATES):
+        while True:
+            result = io.read()
+            assert result.keychain is not None, result.status
+            keychain = result.keychain
+            keychain.add_new_key(f"writer-{index}-{i}", "username", "password")
+            status = io.write(keychain).status
+            if status == Status.SUCCESS:
+                break
+            assert status == Status.CONFLICT_ERROR, status
+            conflicts += 1
+    return UPDATES, conflicts
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        io = IO(Path(directory), "username", "password")
+        io.write(KeyChain())
+        start = perf_counter()
+        with ProcessPoolExecutor(WRITERS) as executor:
+            results = [*executor.map(
+                writer,
+                [io.path] * WRITERS,
+                range(WRITERS)
+            )]
+        elapsed = perf_counter() - start
+        result = io.read()
+        assert result.keychain is not None
+        expected = WRITERS * UPDATES
+        actual = len(result.keychain.get_all_keys())
+        conflicts = sum(i for _, i in results)
+        print(f"writers: {WRITERS}, updates: {expected}, "
+              f"conflicts: {conflicts}, generation: {io.generation}")
+        print(f"{expected / elapsed:.0f} updates/s")
+        assert actual == expected, f"lost {expected - actual} updates"
+        print("no update lost.")
+
+
+if __name__ == "__main__":
+    main()
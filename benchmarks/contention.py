@@ -0,0 +1,66 @@
+"""
+Throughput of a thread-safe 'KeyChain' under concurrent readers and
+writers.
+
+Run from the project root:
+    >   python -m benchmarks.contention
+"""
+import threading
+from time import perf_counter, sleep
+from typing import List
+
+from src import Key, KeyChain, User
+
+DURATION = 1.0
+KEYS = 2000
+
+
+def run(readers: int, writers: int) -> None:
+    keychain = KeyChain().set_thread_safe()
+    keychain.add_keys(
+        Key(f"key-{i}", User("username", "password"), group=f"group-{i % 20}")
+        for i in range(KEYS)
+    )
+    stop = threading.Event()
+    reads: List[int] = [0] * readers
+    writes: List[int] = [0] * writers
+
+    def reader(index: int) -> None:
+        while not stop.is_set():
+            keychain.get_key("key-1", fullmatch=True)
+            reads[index] += 1
+
+    def writer(index: int) -> None:
+        while not stop.is_set():
+            keychain.add_new_key(
+                f"writer-{index}-{writes[index]}",
+                "username",
+                "password"
+            )
+            writes[index] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,))
+               for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,))
+                for i in range(writers)]
+    start = perf_counter()
+    for _thread in threads:
+        _thread.start()
+    sleep(DURATION)
+    stop.set()
+    for _thread in threads:
+        _thread.join()
+    elapsed = perf_counter() - start
+    print(f"readers: {readers}, writers: {writers}"
+          f"{sum(reads) / elapsed:>12.0f} reads/s"
+          f"{sum(writes) / elapsed:>12.0f} writes/s")
+
+
+def main():
+    for writers in (0, 1, 4):
+        for readers in (1, 2, 4, 8):
+            run(readers, writers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Throughput of 'PasswordGenerator'.
+
+Run from the project root:
+    >   python -m benchmarks.generator
+"""
+from time import perf_counter
+
+from src import ModePreset, PasswordGenerator
+
+N = 10000
+
+
+def bench(label: str, func, n: int = N) -> float:
+    start = perf_counter()
+    func(n)
+    elapsed = perf_counter() - start
+    print(f"{label:<40}{n / elapsed:>12.0f} passwords/s")
+    return elapsed
+
+
+def main():
+    for preset in (ModePreset.DEFAULT, ModePreset.UNIFORM_12):
+        generator = PasswordGenerator(preset.value)
+        for unique in (False, True):
+            suffix = f"{preset.name.lower()}, unique={unique}"
+            bench(
+                f"generate ({suffix})",
+                lambda n: [generator.generate(unique=unique) for _ in range(n)]
+            )
+            bench(
+                f"generate_many ({suffix})",
+                lambda n: generator.generate_many(n, unique=unique)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Startup time of the command line interface, and a guard against imports
+creeping back into paths that do not need them.
+
+Every case runs in a fresh interpreter, once with '-X importtime' to
+collect imported modules, then 'RUNS' times to take the median wall time.
+
+Run from the project root:
+    >   python -m benchmarks.startup
+"""
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import List, Set
+
+RUNS = 20
+
+# Never needed to generate a password or to talk to the agent.
+FORBIDDEN = {
+    "asyncio",
+    "concurrent.futures",
+    "csv",
+    "pyperclip",
+    "secrets",
+    "src.agent",
+    "src.io_",
+    "src.models",
+}
+
+SOCKET = str(Path(tempfile.gettempdir()) / "benchmarks-startup.sock")
+
+CASES = {
+    "python -c pass": ["-c", "pass"],
+    "help": [".", "--help"],
+    "lock": [".", "-s", SOCKET, "lock"],
+    "search": [".", "-s", SOCKET, "search", "pattern"],
+    # Same imports as 'generate', without touching the clipboard.
+    "generate": [
+        "-c",
+        "from src.generator import PasswordGenerator; "
+        "PasswordGenerator().generate()"
+    ],
+}
+
+
+def serve(server: socket.socket) -> None:
+    """
+    Stand-in for 'Agent' which answers every request with no result, so
+    that only the startup of the client is measured.
+    """
+    while True:
+        try:
+            connection, _ = server.accept()
+        except OSError:
+            return
+        with connection:
+            connection.recv(65536)
+            connection.sendall(b'{"status": "SUCCESS", "result": []}\n')
+
+
+def imported(args: List[str]) -> Set[str]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True
+    )
+    modules: Set[str] = set()
+    for _line in process.stderr.splitlines():
+        if _line.startswith("import time:") and "|" in _line:
+            _name = _line.rsplit("|", 1)[1].strip()
+            if _name != "imported package":
+                modules.add(_name)
+    return modules
+
+
+def elapsed(args: List[str]) -> float:
+    list_: List[float] = []
+    for _ in range(RUNS):
+        start = perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        list_.append(perf_counter() - start)
+    return median(list_)
+
+
+def main():
+    Path(SOCKET).unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET)
+    server.listen()
+    threading.Thread(target=serve, args=(server,), daemon=True).start()
+    try:
+        failed = run()
+    finally:
+        server.close()
+        Path(SOCKET).unlink(missing_ok=True)
+    if failed:
+        sys.exit(1)
+
+
+def run() -> bool:
+    failed = False
+    for label, args in CASES.items():
+        modules = imported(args)
+        violations = sorted(
+            i for i in modules
+            if any(i == j or i.startswith(j + ".") for j in FORBIDDEN)
+        )
+        print(f"{label:<20}{elapsed(args) * 1000:>8.1f} ms"
+              f"{len(modules):>6} modules")
+        if violations:
+            failed = True
+            print(f"    unexpected imports: {', '.join(violations)}")
+    return failed
+
+
+if __name__ == "__main__":
+    main()
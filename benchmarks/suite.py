@@ -0,0 +1,176 @@
+"""
+Timings and peak memory of hot paths over a synthetic vault, saved as json
+to compare between commits on the same machine.
+
+Each case is timed 'repeat' times, then run once more under 'tracemalloc'
+for its peak, since tracing distorts timings. Setup is never measured.
+
+Run from the project root:
+    >   python -m benchmarks.suite -o before.json
+    >   git checkout <commit>
+    >   python -m benchmarks.suite -o after.json -c before.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from itertools import product
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from src import IO, KeyChain, PasswordGenerator
+
+from .vault import Shape, synthetic
+
+GENERATE = 10000
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[], Any]  # Its result is passed to 'func'.
+    func: Callable[[Any], Any]
+
+
+def cases(keychain: KeyChain, directory: Path) -> Iterator[Case]:
+    string_ = keychain.to_json()
+    io = IO(directory, "username", "password")
+    io.write(keychain)
+    csv_path = directory / "vault.csv"
+    keychain.dump_csv(csv_path)
+
+    def fresh() -> KeyChain:
+        return KeyChain.from_json(string_)
+
+    def write(_: Any) -> None:
+        io.generation = None  # Never a conflict between repeats.
+        io.write(keychain)
+
+    yield Case("IO.read", lambda: None, lambda _: io.read())
+    yield Case("IO.write", lambda: None, write)
+    yield Case(
+        "KeyChain.from_json",
+        lambda: None,
+        lambda _: KeyChain.from_json(string_)
+    )
+    yield Case("KeyChain.to_json", fresh, lambda i: i.to_json())
+    flags = ("keyname_only", "regex_on", "fullmatch", "valid_only")
+    for i, j, k, m in product((True, False), repeat=4):
+        _enabled = ",".join(f for f, v in zip(flags, (i, j, k, m)) if v)
+        yield Case(
+            f"KeyChain.get_key({_enabled})",
+            lambda: None,
+            lambda _, i=i, j=j, k=k, m=m: keychain.get_key(
+                r"key-1.*" if j else "key-1",
+                keyname_only=i,
+                regex_on=j,
+                fullmatch=k,
+                valid_only=m
+            )
+        )
+    yield Case("KeyChain.doppelganger", fresh, lambda i: i.doppelganger)
+    yield Case("KeyChain.regrouping", fresh, lambda i: i.regrouping())
+    yield Case("KeyChain.dump_csv", lambda: None,
+               lambda _: keychain.dump_csv(directory / "dump.csv"))
+    yield Case("KeyChain.load_csv", lambda: None,
+               lambda _: KeyChain.load_csv(csv_path))
+    generator = PasswordGenerator()
+    yield Case(
+        f"PasswordGenerator.generate x {GENERATE}",
+        lambda: None,
+        lambda _: [generator.generate() for _ in range(GENERATE)]
+    )
+
+
+def measure(case: Case, repeat: int) -> Dict[str, float]:
+    list_: List[float] = []
+    for _ in range(repeat):
+        _arg = case.setup()
+        _start = perf_counter()
+        case.func(_arg)
+        list_.append(perf_counter() - _start)
+    arg = case.setup()
+    tracemalloc.start()
+    try:
+        case.func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"min": min(list_), "median": median(list_), "peak": peak}
+
+
+def commit() -> Optional[str]:
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.strip()
+
+
+def compare(results: Dict[str, Any], path: Path) -> None:
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["shape"] != results["shape"]:
+        print("warning: shapes differ, ratios are meaningless.")
+    print(f"\nagainst {baseline.get('commit')} (new / old):")
+    for _name, _new in results["cases"].items():
+        _old = baseline["cases"].get(_name)
+        if _old is None:
+            continue
+        print(f"{_name:<64}"
+              f"{_new['median'] / _old['median']:>7.2f}x time"
+              f"{_new['peak'] / max(_old['peak'], 1):>7.2f}x peak")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    defaults = Shape()
+    for _field in Shape._fields:
+        parser.add_argument(
+            f"--{_field}",
+            type=type(getattr(defaults, _field)),
+            default=getattr(defaults, _field)
+        )
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", type=Path)
+    parser.add_argument("-c", "--compare", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shape = Shape(*(getattr(args, i) for i in Shape._fields))
+    keychain = synthetic(shape, args.seed)
+    results: Dict[str, Any] = {
+        "commit": commit(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "shape": shape._asdict(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "cases": {},
+    }
+    print(f"{shape.size} keys, {shape.size * shape.users} users")
+    with tempfile.TemporaryDirectory() as directory:
+        for _case in cases(keychain, Path(directory)):
+            _result = measure(_case, args.repeat)
+            results["cases"][_case.name] = _result
+            print(f"{_case.name:<64}"
+                  f"{_result['median'] * 1000:>10.2f} ms"
+                  f"{_result['peak'] / 2 ** 20:>10.2f} MiB")
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Synthetic vaults for benchmarks, reproducible by seed.
+"""
+import random
+from typing import NamedTuple
+
+from src import Key, KeyChain, User
+
+
+class Shape(NamedTuple):
+    groups: int = 20
+    keys: int = 250  # per group
+    users: int = 2  # per key
+    urls: int = 1  # per key
+    shared: float = 0.1  # fraction of keynames repeated across groups
+
+    @property
+    def size(self) -> int:
+        return self.groups * self.keys
+
+
+def synthetic(shape: Shape = Shape(), seed: int = 0) -> KeyChain:
+    """
+    Build a 'KeyChain' of 'shape'. Same shape and seed, same vault, except
+    for timestamps.
+    """
+    random_ = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    keychain = KeyChain()
+    keys = []
+    for i in range(shape.groups):
+        _groupname = f"group-{i}"
+        for j in range(shape.keys):
+            if random_.random() < shape.shared:
+                _keyname = f"shared-{j}"
+            else:
+                _keyname = f"key-{i}-{j}"
+            _key = Key(
+                _keyname,
+                group=_groupname,
+                description=f"description of {_keyname}",
+                url_list=[
+                    f"https://{_keyname}.example.com/{k}"
+                    for k in range(shape.urls)
+                ]
+            )
+            _key.add_user(*(
+                User(
+                    f"user-{k}@example.com",
+                    "".join(random_.choices(alphabet, k=16))
+                )
+                for k in range(shape.users)
+            ))
+            keys.append(_key)
+    return keychain.add_keys(keys)
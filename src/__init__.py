@@ -1,6 +1,44 @@
-from .generator import ModePreset, PasswordGenerator
-from .help import Help
-from .io_ import IO
-from .models import Group, Key, KeyChain, User
-from .status import Status
-from .utils import Printer
+"""
+Exports are resolved on first access by module '__getattr__' (PEP 562), so
+that 'import src' costs nothing until a name is used, e.g. generating a
+password never imports 'models' or 'io_'.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from .generator import ModePreset, PasswordGenerator
+    from .help import Help
+    from .io_ import IO
+    from .metrics import Metrics
+    from .models import Group, Key, KeyChain, User
+    from .status import Status
+    from .utils import Printer
+
+_EXPORTS: Dict[str, str] = {
+    "ModePreset": ".generator",
+    "PasswordGenerator": ".generator",
+    "Help": ".help",
+    "IO": ".io_",
+    "Metrics": ".metrics",
+    "Group": ".models",
+    "Key": ".models",
+    "KeyChain": ".models",
+    "User": ".models",
+    "Status": ".status",
+    "Printer": ".utils",
+}
+
+__all__: List[str] = [*_EXPORTS]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value  # Later access skips '__getattr__'.
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(__all__)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import re
+import socket
+import stat
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .batch import export_keys
+from .generator import PasswordGenerator
+from .io_ import IO
+from .models import KeyChain
+from .status import Status
+
+
+class Agent:
+    """
+    Long-running process holding a decrypted 'KeyChain', like 'ssh-agent'.
+
+    Requests and responses are newline-delimited json over a Unix domain
+    socket, which only the owner can access. Supported requests:
+        {"op": "get", "pattern": str}
+        {"op": "search", "pattern": str, "regex_on": bool,
+         "limit": int | null}
+        {"op": "generate", "mode": str | list | null, "unique": bool}
+        {"op": "lock"}
+    Responses are {"status": <name of 'Status'>, "result": ...}.
+
+    The keychain is wiped and dropped, and the agent exits, on request
+    "lock" or after 'timeout' seconds without requests.
+    """
+
+    def __init__(self, io: IO, path: Path, timeout: float = 900.0) -> None:
+        self.io: IO = io
+        self.path: Path = path
+        self.timeout: float = timeout
+        self.keychain: Optional[KeyChain] = None
+        self.__last: float = 0.0
+        self.__locked: Optional[asyncio.Event] = None
+
+    def unlock(self) -> Status:
+        result = self.io.read()
+        self.keychain = result.keychain
+        return result.status
+
+    def lock(self) -> None:
+        self.__drop()
+        if self.__locked is not None:
+            self.__locked.set()
+
+    def __drop(self) -> None:
+        """
+        Zero passwords in place, since the keychain may linger, and forget
+        cached keys of the file.
+        """
+        if self.keychain is not None:
+            self.keychain.wipe()
+        self.keychain = None
+        self.io.lock()
+
+    def __dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "lock":
+            self.lock()
+            return {"status": Status.SUCCESS.name, "result": None}
+        if op == "generate":
+            try:
+                generator = PasswordGenerator(request.get("mode"))
+            except (TypeError, ValueError):
+                return {"status": Status.VALUE_ERROR.name, "result": None}
+            password = generator.generate(unique=request.get("unique", False))
+            return {"status": Status.SUCCESS.name, "result": password}
+        if self.keychain is None:
+            return {"status": Status.LOCKED.name, "result": None}
+        pattern = request.get("pattern")
+        if not isinstance(pattern, str):
+            return {"status": Status.VALUE_ERROR.name, "result": None}
+        if op == "get":
+            keys = self.keychain.get_key(pattern, fullmatch=True)
+        elif op == "search":
+            limit = request.get("limit")
+            if limit is not None and (
+                not isinstance(limit, int) or limit < 0
+            ):
+                return {"status": Status.VALUE_ERROR.name, "result": None}
+            try:
+                result = export_keys(islice(
+                    self.keychain.iter_key(
+                        pattern,
+                        keyname_only=False,
+                        regex_on=bool(request.get("regex_on", False))
+                    ),
+                    limit
+                ))
+            except re.error:
+                return {"status": Status.VALUE_ERROR.name, "result": None}
+            return {"status": Status.SUCCESS.name, "result": result}
+        else:
+            return {"status": Status.VALUE_ERROR.name, "result": None}
+        return {"status": Status.SUCCESS.name, "result": export_keys(keys)}
+
+    async def __handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.__last = loop.time()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    response = {"status": Status.VALUE_ERROR.name,
+                                "result": None}
+                else:
+                    response = self.__dispatch(request)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+                if self.keychain is None:
+                    break
+        finally:
+            writer.close()
+
+    def __claim(self) -> None:
+        """
+        Remove a socket left behind by an agent which is gone. Raise
+        FileExistsError if 'path' is not a socket or an agent answers.
+        """
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"not a socket: '{self.path}'")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            try:
+                s.connect(str(self.path))
+            except ConnectionRefusedError:
+                pass
+            else:
+                raise FileExistsError(f"agent running at '{self.path}'")
+        self.path.unlink()
+
+    async def serve(self) -> None:
+        """
+        Serve until locked. The keychain must be unlocked beforehand.
+
+        Raise FileExistsError, after wiping the keychain, if 'path' is in
+        use, i.e. is not a socket or has an agent answering on it.
+        """
+        loop = asyncio.get_running_loop()
+        self.__locked = asyncio.Event()
+        self.__last = loop.time()
+        try:
+            self.__claim()
+            umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(
+                    self.__handle,
+                    path=str(self.path)
+                )
+            finally:
+                os.umask(umask)
+        except OSError:
+            self.__drop()
+            raise
+        # Only the socket created here is removed, never one rebound by
+        # another agent in the meantime.
+        inode = os.lstat(self.path).st_ino
+        try:
+            async with server:
+                while not self.__locked.is_set():
+                    remaining = self.__last + self.timeout - loop.time()
+                    if remaining <= 0:
+                        self.lock()
+                        break
+                    try:
+                        await asyncio.wait_for(
+                            self.__locked.wait(),
+                            remaining
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self.__drop()
+            try:
+                if os.lstat(self.path).st_ino == inode:
+                    self.path.unlink()
+            except FileNotFoundError:
+                pass
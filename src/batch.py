@@ -0,0 +1,174 @@
+import csv
+import json
+import re
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .generator import PasswordGenerator
+from .models import Key, KeyChain
+from .status import Status
+
+_MISSING: Any = object()
+
+
+def export_keys(keys: Iterable[Key]) -> List[Dict[str, Any]]:
+    list_: List[Dict[str, Any]] = []
+    for _key in keys:
+        _pair = _key.aspair()
+        if _pair is not None:
+            list_.append({"group": _key.group, "keyname": _pair.key,
+                          **_pair.value})
+    return list_
+
+
+def _field(
+    request: Dict[str, Any],
+    name: str,
+    type_: type,
+    default: Any = _MISSING
+) -> Any:
+    """
+    Raise ValueError if a required field is missing, TypeError if a field
+    is neither of 'type_' nor the default.
+    """
+    if name not in request:
+        if default is _MISSING:
+            raise ValueError(name)
+        return default
+    value = request[name]
+    if value is not default and not isinstance(value, type_):
+        raise TypeError(name)
+    return value
+
+
+class Batch:
+    """
+    Run many commands against one decrypted 'KeyChain', so that scripts
+    need neither a process launch nor a save per operation.
+
+    Commands and responses are newline-delimited json, as for 'Agent'.
+    Supported commands:
+        {"op": "get", "pattern": str}
+        {"op": "search", "pattern": str, "regex_on": bool,
+         "limit": int | null}
+        {"op": "add", "keyname": str, "username": str,
+         "password": str | null, "mode": str | list | null,
+         "group": str, "description": str | null, "url": str | null}
+        {"op": "delete", "group": str, "keyname": str | null}
+        {"op": "recover", "group": str, "keyname": str | null}
+        {"op": "generate", "mode": str | list | null, "unique": bool}
+        {"op": "rotate", "group": str | null, "mode": str | list | null,
+         "unique": bool}
+        {"op": "import", "path": str, "group": str}
+        {"op": "export", "path": str}
+    Responses are {"status": <name of 'Status'>, "result": ...}. If
+    "password" of "add" is null, a password is generated by "mode".
+
+    Only valid keys are saved, so "recover" only undoes a "delete" of
+    the same session.
+
+    Nothing is saved here. Attribute 'modified' turns True once any
+    command has changed the keychain, then the caller saves it once.
+    """
+
+    def __init__(self, keychain: KeyChain) -> None:
+        self.keychain: KeyChain = keychain
+        self.modified: bool = False
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = self.__dispatch(request)
+        except KeyError:
+            return {"status": Status.NOT_FOUND.name, "result": None}
+        except (TypeError, ValueError, re.error, csv.Error):
+            return {"status": Status.VALUE_ERROR.name, "result": None}
+        except OSError:
+            return {"status": Status.FILE_ERROR.name, "result": None}
+        return {"status": Status.SUCCESS.name, "result": result}
+
+    def __dispatch(self, request: Dict[str, Any]) -> Any:
+        op = _field(request, "op", str)
+        if op == "get":
+            keys = self.keychain.iter_key(
+                _field(request, "pattern", str),
+                fullmatch=True
+            )
+            return export_keys(keys)
+        if op == "search":
+            keys = self.keychain.iter_key(
+                _field(request, "pattern", str),
+                keyname_only=False,
+                regex_on=_field(request, "regex_on", bool, False)
+            )
+            limit = _field(request, "limit", int, None)
+            if limit is not None and limit < 0:
+                raise ValueError
+            return export_keys(islice(keys, limit))
+        if op == "generate":
+            generator = PasswordGenerator(request.get("mode"))
+            return generator.generate(
+                unique=_field(request, "unique", bool, False)
+            )
+        if op == "add":
+            keyname = _field(request, "keyname", str)
+            username = _field(request, "username", str)
+            password = _field(request, "password", str, None)
+            if password is None:
+                generator = PasswordGenerator(request.get("mode"))
+                password = generator.generate()
+            self.keychain.add_new_key(
+                keyname,
+                username,
+                password,
+                group=_field(request, "group", str, "Default"),
+                description=_field(request, "description", str, None),
+                url=_field(request, "url", str, None)
+            )
+            self.modified = True
+            return password
+        if op in ("delete", "recover"):
+            groupname = _field(request, "group", str)
+            keyname = _field(request, "keyname", str, None)
+            with self.keychain.bulk() as bulk:
+                getattr(bulk, op)(groupname, keyname)
+            self.modified = True
+            return None
+        if op == "rotate":
+            rotation = self.keychain.rotate(
+                _field(request, "group", str, None),
+                request.get("mode"),
+                unique=_field(request, "unique", bool, False)
+            )
+            if rotation.rotated:
+                self.modified = True
+            return [[*i] for i in rotation.rotated]
+        if op == "import":
+            loaded = KeyChain.load_csv(
+                _field(request, "path", str),
+                group=_field(request, "group", str, "Default")
+            )
+            imported = loaded.get_all_keys()
+            if imported:
+                self.keychain.add_keys(imported)
+                self.modified = True
+            return len(imported)
+        if op == "export":
+            self.keychain.dump_csv(_field(request, "path", str))
+            return None
+        raise ValueError(op)
+
+    def run(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a response for each non-blank line, in order.
+        """
+        for _line in lines:
+            if not _line.strip():
+                continue
+            try:
+                request = json.loads(_line)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                yield {"status": Status.VALUE_ERROR.name, "result": None}
+                continue
+            yield self.dispatch(request)
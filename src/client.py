@@ -0,0 +1,34 @@
+"""
+Thin client of 'Agent', which imports nothing beyond 'json' and 'socket'
+so that a request costs little more than interpreter startup.
+"""
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, Union
+
+SOCKET: Path = Path(
+    os.environ.get("KEYCHAIN_SOCKET", Path.home() / ".keychain.sock")
+)
+
+
+def request(path: Union[Path, str] = SOCKET, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Send one request, e.g. 'request(op="get", pattern="github")', and
+    return the response.
+
+    Raise OSError if the agent is not running.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(path))
+        s.sendall(json.dumps(kwargs).encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+    return json.loads(b"".join(chunks))
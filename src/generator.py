@@ -1,6 +1,9 @@
-import secrets
+import math
+import os
+import threading
 from enum import Enum
-from typing import Iterable, NamedTuple, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 from .utils import Char
 
@@ -21,6 +24,20 @@ class Mode(NamedTuple):
 
     @classmethod
     def make(cls, mode: Optional[Iterable] = None) -> "Mode":
+        """
+        Parsed results of immutable arguments, i.e. None, str, bytes and
+        tuple, are cached. Others, e.g. iterators, which are hashable but
+        consumed by parsing, are parsed every time.
+        """
+        if mode is not None and not isinstance(mode, (str, bytes, tuple)):
+            return cls._parse(mode)
+        try:
+            return _make_mode(mode)
+        except TypeError:  # A tuple of unhashable values.
+            return cls._parse(mode)
+
+    @classmethod
+    def _parse(cls, mode: Optional[Iterable] = None) -> "Mode":
         if mode is None:
             return cls(8, 4, 4, 0)
         if isinstance(mode, bytes):
@@ -44,6 +61,9 @@ class Mode(NamedTuple):
             raise ValueError("invalid argument")
 
 
+_make_mode = lru_cache(maxsize=256)(Mode._parse)
+
+
 class ModePreset(Enum):
     DEFAULT = Mode(8, 4, 4, 0)
     UNIFORM = Mode(4, 4, 4, 4)
@@ -61,6 +81,175 @@ class ModePreset(Enum):
     UNIFORM_16 = Mode(4, 4, 4, 4)
 
 
+_CHARSETS = (
+    Char.LOWERCASE.value,
+    Char.UPPERCASE.value,
+    Char.DIGITS.value,
+    Char.PUNCTUATION.value
+)
+
+
+class _Table(NamedTuple):
+    """
+    Compiled generation policy.
+
+    'limits' are rejection-sampling thresholds of single bytes for each
+    alphabet, or 0 if an alphabet is larger than 256 characters.
+    """
+    alphabets: Tuple[str, ...]
+    counts: Tuple[int, ...]
+    limits: Tuple[int, ...]
+    entropy: float
+
+
+def _entropy(alphabets: Tuple[str, ...], counts: Tuple[int, ...],
+             unique: bool) -> float:
+    """
+    Bits of log2 of the number of possible passwords, i.e. arrangements of
+    the classes times the choices within each class.
+    """
+    bits = math.lgamma(sum(counts) + 1)
+    for _alphabet, _count in zip(alphabets, counts):
+        bits -= math.lgamma(_count + 1)
+        if unique:
+            volume = len(_alphabet)
+            bits += math.lgamma(volume + 1) - math.lgamma(volume - _count + 1)
+        else:
+            bits += _count * math.log(len(_alphabet))
+    return bits / math.log(2)
+
+
+@lru_cache(maxsize=256)
+def _compile(
+    mode: Mode,
+    charset: Optional[str],
+    exclude: str,
+    entropy: Optional[float],
+    unique: bool
+) -> _Table:
+    if charset is None:
+        classes: Tuple[str, ...] = _CHARSETS
+        weights: Tuple[int, ...] = tuple(mode)
+    else:
+        classes = (charset,)
+        weights = (sum(mode),)
+    list_: List[str] = []
+    for _class in classes:
+        # Remove duplicates and excluded characters, preserve order.
+        list_.append("".join(dict.fromkeys(
+            i for i in _class if i not in exclude
+        )))
+    alphabets = []
+    counts = []
+    for _alphabet, _weight in zip(list_, weights):
+        if _weight == 0:
+            continue
+        if not _alphabet:
+            raise ValueError("no character left in a required class")
+        alphabets.append(_alphabet)
+        counts.append(_weight)
+    weights = tuple(counts)
+    if unique:
+        counts = [min(i, len(j)) for i, j in zip(counts, alphabets)]
+    if entropy is not None:
+        if not entropy > 0:
+            raise ValueError("entropy must be greater than 0")
+        # Grow each class in proportion to its weight until the target
+        # is met, starting from one character of each class.
+        counts = [1] * len(alphabets)
+        volumes = [len(i) if unique else math.inf for i in alphabets]
+        while _entropy(tuple(alphabets), tuple(counts), unique) < entropy:
+            candidates = [
+                i for i in range(len(counts)) if counts[i] < volumes[i]
+            ]
+            if not candidates or sum(counts) >= 4096:
+                raise ValueError("entropy target is unreachable")
+            index = min(
+                candidates,
+                key=lambda i: (counts[i] + 1) / weights[i]
+            )
+            counts[index] += 1
+    limits = tuple(256 - 256 % len(i) if len(i) <= 256 else 0
+                   for i in alphabets)
+    return _Table(
+        tuple(alphabets),
+        tuple(counts),
+        limits,
+        _entropy(tuple(alphabets), tuple(counts), unique)
+    )
+
+
+class _RandomBuffer:
+    """
+    Cryptographically secure random integers drawn from a buffer, which is
+    refilled by 'os.urandom' (which 'secrets.token_bytes' wraps) in large
+    chunks rather than for every single integer. Module 'secrets' is not
+    imported for startup time.
+
+    Bytes are mapped to range by rejection sampling, thus the result is
+    exactly uniform.
+    """
+    def __init__(self, size: int = 4096) -> None:
+        self.__size: int = size
+        self.__buffer: bytes = b""
+        self.__index: int = 0
+
+    def __take(self, n: int) -> bytes:
+        if self.__index + n > len(self.__buffer):
+            self.__buffer = (
+                self.__buffer[self.__index:]
+                + os.urandom(max(self.__size, n))
+            )
+            self.__index = 0
+        chunk = self.__buffer[self.__index:self.__index + n]
+        self.__index += n
+        return chunk
+
+    def __refill(self) -> None:
+        self.__buffer = os.urandom(self.__size)
+        self.__index = 0
+
+    def randbelow(self, n: int) -> int:
+        """Return a random int in the range [0, n)."""
+        if n <= 0:
+            raise ValueError("upper bound must be positive")
+        width = ((n - 1).bit_length() + 7) // 8
+        span = 1 << (width * 8)
+        limit = span - span % n
+        if width == 1:
+            while True:
+                if self.__index >= len(self.__buffer):
+                    self.__refill()
+                byte = self.__buffer[self.__index]
+                self.__index += 1
+                if byte < limit:
+                    return byte % n
+        while True:
+            value = int.from_bytes(self.__take(width), "little")
+            if value < limit:
+                return value % n
+
+    def choices(self, population: str, k: int, limit: int) -> List[str]:
+        """
+        Return 'k' random elements of 'population' with replacement.
+
+        'limit' must be '256 - 256 % len(population)', or 0 to fall back
+        on method 'randbelow' for population larger than 256.
+        """
+        n = len(population)
+        if not limit:
+            return [population[self.randbelow(n)] for _ in range(k)]
+        list_: List[str] = []
+        while len(list_) < k:
+            if self.__index >= len(self.__buffer):
+                self.__refill()
+            byte = self.__buffer[self.__index]
+            self.__index += 1
+            if byte < limit:
+                list_.append(population[byte % n])
+        return list_
+
+
 class PasswordGenerator:
     """
     Generate random password strings.
@@ -76,23 +265,47 @@ class PasswordGenerator:
 
         If 'mode' is None, the numbers of lowercase, uppercase, digit and
         punctuation characters are 8, 4, 4 and 0 respectively.
-    """
 
-    __char = (
-        Char.LOWERCASE.value,
-        Char.UPPERCASE.value,
-        Char.DIGITS.value,
-        Char.PUNCTUATION.value
-    )
+    charset: str | NoneType
+        User-defined alphabet replacing the 4 classes above, in which case
+        only the sum of 'mode' is taken as the length.
 
-    def __init__(self, mode: Optional[Iterable] = None) -> None:
-        self.__mode = Mode.make(mode)
+    exclude: str
+        Characters never to be used, e.g. 'Char.AMBIGUOUS.value'.
+
+    entropy: float | NoneType
+        Target in bits. If given, the number of characters of each class
+        grows in proportion to 'mode' until the target is met.
+
+    Each policy is compiled once into a cached alphabet table, so repeated
+    generation with the same policy does no setup.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[Iterable] = None,
+        *,
+        charset: Optional[str] = None,
+        exclude: str = "",
+        entropy: Optional[float] = None
+    ) -> None:
+        if charset is not None and not isinstance(charset, str):
+            raise TypeError
+        if not isinstance(exclude, str):
+            raise TypeError
+        self.__charset: Optional[str] = charset
+        self.__exclude: str = exclude
+        self.__entropy: Optional[float] = entropy
+        self.__local: threading.local = threading.local()
+        self.__set_mode(mode)
 
     def __get_mode(self) -> Mode:
         return self.__mode
 
-    def __set_mode(self, mode: Iterable) -> None:
-        self.__mode = Mode.make(mode)
+    def __set_mode(self, mode: Optional[Iterable]) -> None:
+        _mode = Mode.make(mode)
+        self.__table(_mode, False)  # Raise ValueError early.
+        self.__mode = _mode
 
     mode = property(fget=__get_mode, fset=__set_mode)
 
@@ -100,17 +313,72 @@ class PasswordGenerator:
         self.__set_mode(mode)
         return self
 
+    @property
+    def entropy(self) -> float:
+        """Bits of entropy of passwords generated with current policy."""
+        return self.__table(self.__mode, False).entropy
+
+    def __table(self, mode: Mode, unique: bool) -> _Table:
+        return _compile(
+            mode,
+            self.__charset,
+            self.__exclude,
+            self.__entropy,
+            unique
+        )
+
+    def __pools(self) -> Dict[str, List[str]]:
+        """
+        Reusable permutations of each alphabet for unique sampling, kept
+        per instance and per thread, since they are shuffled in place.
+        """
+        pools: Optional[Dict[str, List[str]]] = getattr(
+            self.__local, "pools", None
+        )
+        if pools is None:
+            pools = self.__local.pools = {}
+        return pools
+
     @staticmethod
-    def __shuffle(x: list, /) -> None:
+    def __shuffle(x: list, buffer: _RandomBuffer, /) -> None:
         """
         The same algorithm as method 'random.Random.shuffle',
-        with the function 'secrets.randbelow' instead.
+        with a cryptographically secure 'randbelow' instead.
         """
         for i in reversed(range(1, len(x))):
             # pick an element in x[:i+1] with which to exchange x[i]
-            j = secrets.randbelow(i + 1)
+            j = buffer.randbelow(i + 1)
             x[i], x[j] = x[j], x[i]
 
+    def __generate(
+        self,
+        table: _Table,
+        unique: bool,
+        buffer: _RandomBuffer,
+        pools: Dict[str, List[str]]
+    ) -> str:
+        """
+        'pools' are those of method '__pools', built once per thread.
+        """
+        chosen: List[str] = []
+        for _alphabet, _count, _limit in zip(*table[:3]):
+            if not unique:
+                chosen.extend(buffer.choices(_alphabet, _count, _limit))
+                continue
+            if _alphabet not in pools:
+                pools[_alphabet] = [*_alphabet]
+            # Partial Fisher-Yates: after i steps, pool[:i] is a uniform
+            # sample without replacement, whatever order pool was in.
+            pool = pools[_alphabet]
+            volume = len(pool)
+            for i in range(_count):
+                j = i + buffer.randbelow(volume - i)
+                pool[i], pool[j] = pool[j], pool[i]
+            chosen.extend(pool[:_count])
+        self.__shuffle(chosen, buffer)
+        password = "".join(chosen)
+        return password
+
     def generate(
         self,
         mode: Optional[Iterable] = None,
@@ -125,20 +393,31 @@ class PasswordGenerator:
             _mode = self.__mode
         else:
             _mode = Mode.make(mode)
-        chosen = []
-        for index, length in enumerate(_mode):
-            if not unique:
-                for _ in range(length):
-                    chosen.append(secrets.choice(self.__char[index]))
-            else:
-                list_ = [*self.__char[index]]
-                for _ in range(length):
-                    try:
-                        choice = secrets.choice(list_)
-                    except IndexError:
-                        break
-                    chosen.append(choice)
-                    list_.remove(choice)
-        self.__shuffle(chosen)
-        password = "".join(chosen)
-        return password
+        table = self.__table(_mode, unique)
+        buffer = _RandomBuffer(sum(table.counts) * 2)
+        return self.__generate(table, unique, buffer, self.__pools())
+
+    def generate_many(
+        self,
+        n: int,
+        mode: Optional[Iterable] = None,
+        *,
+        unique: bool = False
+    ) -> List[str]:
+        """
+        Generate 'n' passwords at once, drawing randomness from one large
+        buffer instead of calling 'os.urandom' per character.
+
+        Passwords follow the same rules as method 'generate'.
+        """
+        if mode is None:
+            _mode = self.__mode
+        else:
+            _mode = Mode.make(mode)
+        table = self.__table(_mode, unique)
+        # 2 bytes per character suffices in most cases, including shuffle.
+        buffer = _RandomBuffer(max(4096, n * sum(table.counts) * 2))
+        pools = self.__pools()
+        return [
+            self.__generate(table, unique, buffer, pools) for _ in range(n)
+        ]
@@ -21,4 +21,143 @@ class Help(Enum):
     FILE = """
 
     """
+
+    SOCKET = """
+        path of the agent socket, defaults to $KEYCHAIN_SOCKET or
+        ~/.keychain.sock
+    """
+
+    AGENT = """
+        unlock the keychain once and serve requests until locked or idle
+    """
+
+    TIMEOUT = """
+        seconds without requests before the agent locks and exits
+    """
+
+    GET = """
+        copy the password of a key to the clipboard
+    """
+
+    SEARCH = """
+        list keys matching the pattern in any field
+    """
+
+    GENERATE = """
+        generate a password and copy it to the clipboard
+    """
+
+    LOCK = """
+        lock the agent
+    """
+
+    PATTERN = """
+        keyname for 'get', or pattern for 'search'
+    """
+
+    USERNAME = """
+        username of the key, defaults to the first one
+    """
+
+    REGEX = """
+        take the pattern as a regular expression
+    """
+
+    MODE = """
+        numbers of lowercase, uppercase, digit and punctuation characters,
+        e.g. 8-4-4-0
+    """
+
+    UNIQUE = """
+        no repeated characters
+    """
+
+    LIMIT = """
+        show at most this many results
+    """
+
+    PAGE = """
+        pause after this many lines
+    """
+
+    ADD = """
+        add a key, replacing any valid key of the same name in the group
+    """
+
+    KEYNAME = """
+        name of the key
+    """
+
+    NEW_USERNAME = """
+        username of the new user
+    """
+
+    GROUP = """
+        group of the key, defaults to 'Default'
+    """
+
+    KEY_DESCRIPTION = """
+        description of the key
+    """
+
+    URL = """
+        url of the key
+    """
+
+    ADD_MODE = """
+        generate the password in this mode instead of prompting, see
+        'generate'
+    """
+
+    DELETE = """
+        delete a key, or a whole group; only valid keys are saved, so this
+        cannot be undone, except by "recover" within the same 'batch'
+    """
+
+    WHOLE_GROUP = """
+        name of the key, the whole group if omitted
+    """
+
+    IMPORT = """
+        import keys from a csv file of Google Password Manager
+    """
+
+    EXPORT = """
+        export valid keys to a csv file for Google Password Manager
+    """
+
+    CSV = """
+        path of the csv file
+    """
+
+    ROTATE = """
+        replace passwords of all valid users with generated ones
+    """
+
+    ROTATE_GROUP = """
+        only rotate keys in this group
+    """
+
+    BATCH = """
+        run newline-delimited json commands against the file and save once,
+        printing a json response per command, see 'src.batch.Batch';
+        credentials are taken from $KEYCHAIN_USERNAME and $KEYCHAIN_PASSWORD
+        if set
+    """
+
+    COMMANDS = """
+        file of commands, defaults to stdin
+    """
+
+    MEMORY = """
+        report memory used to read the file and held by the keychain
+    """
+
+    METRICS = """
+        print timings of each stage, e.g. decryption, to stderr when done
+    """
+
+    PROFILE = """
+        run under cProfile and print the top functions to stderr when done
+    """
     
\ No newline at end of file
@@ -1,10 +1,20 @@
-from hashlib import sha256
+import hashlib
+import hmac
+import os
+import threading
+import tracemalloc
+from hashlib import sha256, shake_256
 from pathlib import Path
-from typing import NamedTuple, Optional, Union
+from time import monotonic
+from typing import IO as _File
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
+from .metrics import Metrics
 from .models import KeyChain
 from .status import Status
 
+_metrics = Metrics()
+
 try:
     from random import randbytes
     from random import seed as set_seed
@@ -20,22 +30,319 @@ except ImportError:
     randbytes = _inst.randbytes
     set_seed = _inst.seed
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+
+def _lock(file: _File, exclusive: bool) -> None:
+    """
+    Advisory lock released on close. No-op where 'fcntl' is unavailable.
+    """
+    if fcntl is not None:
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.flock(file.fileno(), operation)
+
+
+LEGACY = "legacy"
+CIPHER = "shake256"
+
+# Fields covered by the tag, besides the ciphertext, in this order.
+_TAGGED = ("cipher", "kdf", "n", "r", "p", "i", "salt", "nonce", "check",
+           "root", "gen")
+# Fields which the derived keys depend on.
+_KDF = ("kdf", "n", "r", "p", "i", "salt")
+
+# Bounds on parameters read from headers, which are only authenticated
+# after the derivation, i.e. 16 times the defaults of '_kdf_params'.
+_MAX_SCRYPT_MEMORY = 2 ** 29  # bytes, 128 * n * r
+_MAX_SCRYPT_WORK = 2 ** 22  # n * r * p
+_MAX_PBKDF2_ITERATIONS = 9600000
+_MAX_SALT = 64  # bytes
+
+# Decrypted in chunks of this size, see '_xor_into'.
+_XOR_CHUNK = 2 ** 16  # bytes
+
+
+class _Keys(NamedTuple):
+    cipher: bytes
+    mac: bytes
+
+
+def _credentials(username: str, password: str) -> bytes:
+    """
+    Input of the key derivation, with each field prefixed by its length,
+    so that no two pairs of username and password share it.
+    """
+    list_: List[bytes] = []
+    for _field in (username, password):
+        _encoded = _field.encode("utf-8")
+        list_.append(len(_encoded).to_bytes(4, "big"))
+        list_.append(_encoded)
+    return b"".join(list_)
+
+
+def _kdf_params() -> Dict[str, str]:
+    """
+    Fresh salt and cost parameters, by scrypt if available, otherwise by
+    PBKDF2-HMAC-SHA256.
+    """
+    salt = os.urandom(16).hex()
+    if hasattr(hashlib, "scrypt"):
+        return {"kdf": "scrypt", "n": "32768", "r": "8", "p": "1",
+                "salt": salt}
+    return {"kdf": "pbkdf2", "i": "600000", "salt": salt}
+
+
+def _derive(secret: bytes, fields: Dict[str, str]) -> _Keys:
+    """
+    Raise KeyError or ValueError on missing or unknown parameters, or on
+    costs out of bounds, before deriving anything.
+    """
+    salt = bytes.fromhex(fields["salt"])
+    if len(salt) > _MAX_SALT:
+        raise ValueError("salt too long")
+    kdf = fields["kdf"]
+    if kdf == "scrypt":
+        n, r, p = int(fields["n"]), int(fields["r"]), int(fields["p"])
+        if min(n, r, p) < 1:
+            raise ValueError("scrypt cost out of bounds")
+        if 128 * n * r > _MAX_SCRYPT_MEMORY or n * r * p > _MAX_SCRYPT_WORK:
+            raise ValueError("scrypt cost out of bounds")
+        master = hashlib.scrypt(
+            secret,
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=256 * r * (n + p),
+            dklen=64
+        )
+    elif kdf == "pbkdf2":
+        iterations = int(fields["i"])
+        if not 1 <= iterations <= _MAX_PBKDF2_ITERATIONS:
+            raise ValueError("pbkdf2 iterations out of bounds")
+        master = hashlib.pbkdf2_hmac(
+            "sha256",
+            secret,
+            salt,
+            iterations,
+            dklen=64
+        )
+    else:
+        raise ValueError(kdf)
+    return _Keys(master[:32], master[32:])
+
+
+def _keystream(key: bytes, nonce: str, length: int) -> bytes:
+    """Whole keystream in one call, squeezed by 'shake_256' in C."""
+    return shake_256(key + bytes.fromhex(nonce)).digest(length)
+
+
+def _xor(
+    data: Union[bytes, memoryview],
+    keystream: Union[bytes, memoryview]
+) -> bytes:
+    xor = int.from_bytes(data, "big") ^ int.from_bytes(keystream, "big")
+    return xor.to_bytes(len(data), "big")
+
+
+def _xor_into(data: Union[bytes, memoryview], keystream: bytes) -> bytearray:
+    """
+    Same as '_xor', into a 'bytearray' which the caller can wipe. Chunked,
+    so that temporaries which cannot be wiped stay small.
+    """
+    buffer = bytearray(len(data))
+    view_ = memoryview(keystream)
+    for i in range(0, len(data), _XOR_CHUNK):
+        _end = i + _XOR_CHUNK
+        buffer[i:_end] = _xor(data[i:_end], view_[i:_end])
+    return buffer
+
+
+def _sign(key: bytes, digest: str) -> str:
+    return hmac.new(key, digest.encode("utf-8"), sha256).hexdigest()
+
+
+def _check(keys: _Keys) -> str:
+    """Verifier telling a wrong password from a corrupted file."""
+    return hmac.new(keys.mac, b"KEYCHAIN", sha256).hexdigest()[:32]
+
+
+def _tag(
+    keys: _Keys,
+    fields: Dict[str, str],
+    encrypted: Union[bytes, memoryview]
+) -> str:
+    list_ = [f"{i}={fields[i]}" for i in _TAGGED if i in fields]
+    hmac_ = hmac.new(keys.mac, " ".join(list_).encode("utf-8"), sha256)
+    hmac_.update(encrypted)
+    return hmac_.hexdigest()
+
+
+_CacheKey = Tuple[str, bytes, Tuple[Tuple[str, str], ...]]
+
+
+class _KeyCache:
+    """
+    Process-local derived keys by (path, credentials, kdf parameters), so
+    that the key derivation is paid once per unlock, instead of once per
+    read or write. Credentials are only kept as a fingerprint keyed by a
+    random key per process.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__key = os.urandom(32)
+        self.__entries: Dict[_CacheKey, Tuple[_Keys, float]] = {}
+
+    def fingerprint(self, credentials: bytes) -> bytes:
+        return hmac.new(self.__key, credentials, sha256).digest()
+
+    def get(self, key: _CacheKey) -> Optional[_Keys]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= monotonic():
+                del self.__entries[key]
+                return None
+            return entry[0]
+
+    def put(self, key: _CacheKey, keys: _Keys, ttl: float) -> None:
+        """
+        No-op unless 'ttl' is positive. Expiry is never extended, i.e. an
+        entry not yet expired keeps its deadline.
+        """
+        if ttl <= 0:
+            return
+        now = monotonic()
+        with self.__lock:
+            for _key in [i for i, j in self.__entries.items() if j[1] <= now]:
+                del self.__entries[_key]
+            if key not in self.__entries:
+                self.__entries[key] = (keys, now + ttl)
+
+    def forget(self, path: Optional[str] = None) -> None:
+        """Drop keys derived for 'path', or for all paths if None."""
+        with self.__lock:
+            if path is None:
+                self.__entries.clear()
+                return
+            for _key in [i for i in self.__entries if i[0] == path]:
+                del self.__entries[_key]
+
+
+_cache = _KeyCache()
+
 
 class _Result(NamedTuple):
     status: Status
     keychain: Optional[KeyChain]
 
 
+class _Trace(NamedTuple):
+    result: _Result
+    retained: int  # bytes still allocated after reading, mostly 'KeyChain'
+    peak: int  # bytes at peak while reading
+    top: List[Tuple[str, int]]  # ("<file>:<line>", bytes retained)
+
+
+class _Header(NamedTuple):
+    seed_digest: Optional[str]
+    fields: Dict[str, str]
+
+    @classmethod
+    def parse(cls, line: bytes) -> "_Header":
+        """
+        The second line of file consists of the legacy seed digest and
+        optional space-separated 'name=value' fields.
+        """
+        seed_digest = None
+        fields: Dict[str, str] = {}
+        for _token in line.decode("utf-8").split():
+            if "=" in _token:
+                _name, _value = _token.split("=", 1)
+                fields[_name] = _value
+            else:
+                seed_digest = _token
+        return cls(seed_digest, fields)
+
+    @property
+    def generation(self) -> int:
+        """Raise ValueError if field 'gen' is malformed."""
+        generation = int(self.fields.get("gen", 0))
+        if generation < 0:
+            raise ValueError(generation)
+        return generation
+
+    def dump(self) -> bytes:
+        list_: List[str] = []
+        if self.seed_digest is not None:
+            list_.append(self.seed_digest)
+        for _name, _value in self.fields.items():
+            list_.append(f"{_name}={_value}")
+        return " ".join(list_).encode("utf-8")
+
+
 class IO:
+    """
+    File format:
+        KEYCHAIN
+        cipher=shake256 kdf=scrypt n=<cost> r=<block size> p=<parallelism>
+            salt=<hex> nonce=<hex> check=<hex> root=<hex>
+            gen=<generation> tag=<hex>
+        <encrypted json>
+
+    where the second line is a single line. The keys for the cipher and
+    for HMAC-SHA256 are derived from username and password by scrypt
+    ("kdf=pbkdf2 i=<iterations>" where scrypt is unavailable), with a
+    fresh salt on every write. The keystream is 'shake_256' over the
+    cipher key and a fresh nonce.
+
+    Field 'check' tells a wrong password from a corrupted file, and 'tag'
+    authenticates every other field and the ciphertext, before anything
+    is decrypted.
+
+    Derived keys are cached for 'KDF_TTL' seconds per path, credentials and
+    salt, until method 'lock'. Once an instance has read or written, its
+    writes keep the salt with a fresh nonce, so that a read-modify-write
+    cycle derives keys only once.
+
+    Files in the legacy format, i.e. a seed digest instead of 'cipher'
+    with a keystream from 'random' seeded by username and password, are
+    still readable. Its seed, i.e. attribute 'seed', is username and
+    password concatenated as they are, which is ambiguous but cannot be
+    changed without breaking legacy files. Attribute 'cipher' selects the
+    format written, which is "shake256" by default, or "legacy".
+
+    Field 'root' is 'KeyChain.digest' signed by HMAC, which is verified on
+    read. Files without it are still readable.
+
+    Field 'gen' is incremented on every write. Reading and writing hold a
+    shared and an exclusive advisory lock on the file respectively. Once
+    an instance has read or written, a write returns a conflict if the
+    file has been written by anyone else in between, instead of
+    overwriting it.
+    """
+
+    KDF_TTL: float = 900.0  # seconds, 0 to disable caching
 
     def __init__(
         self,
         path: Path,
         username: str,
-        password: str
+        password: str,
+        *,
+        cipher: str = CIPHER
     ) -> None:
         self.path = path
-        self.seed = username + password
+        self.seed = username + password  # Legacy format only.
+        self.__credentials = _credentials(username, password)
+        self.cipher = cipher
+        self.generation: Optional[int] = None
+        self.__params: Optional[Dict[str, str]] = None
 
     def __setattr__(self, __name: str, __value: Union[Path, str]) -> None:
         if __name == "path":
@@ -46,36 +353,250 @@ class IO:
         if __name == "seed":
             if not isinstance(__value, str):
                 raise TypeError
+        if __name == "cipher":
+            if __value not in (CIPHER, LEGACY):
+                raise ValueError
         return super().__setattr__(__name, __value)
 
-    def read(self) -> _Result:
+    def lock(self) -> None:
+        """Drop keys cached for this path, under any credentials."""
+        _cache.forget(str(self.path.resolve()))
+
+    def __derive(
+        self,
+        fields: Dict[str, str],
+        stage: str,
+        check: Optional[str] = None
+    ) -> Optional[_Keys]:
+        """
+        Keys for the kdf parameters in 'fields', cached if derived before.
+        None if they fail 'check'. Only keys passing it are cached.
+
+        Raise KeyError or ValueError on missing or unknown parameters.
+        """
+        params = tuple((i, fields[i]) for i in _KDF if i in fields)
+        key = (
+            str(self.path.resolve()),
+            _cache.fingerprint(self.__credentials),
+            params
+        )
+        keys = _cache.get(key)
+        hit = keys is not None
+        if keys is not None:
+            _metrics.count("io.kdf.hits")
+        else:
+            with _metrics.stage(stage):
+                keys = _derive(self.__credentials, dict(params))
+        if check is not None and not hmac.compare_digest(_check(keys), check):
+            return None
+        if not hit:
+            _cache.put(key, keys, self.KDF_TTL)
+        return keys
+
+    def read_header(self) -> Optional[_Header]:
+        """
+        Read the header only, without decrypting. None if unknown format.
+        """
         with open(self.path, "rb") as f:
-            lines = f.readlines()
-        format = lines[0].strip().upper()
+            _lock(f, exclusive=False)
+            format = f.readline().strip().upper()
+            if format != b"KEYCHAIN":
+                return None
+            return _Header.parse(f.readline())
+
+    @_metrics.timed("io.read")
+    def read(self) -> _Result:
+        """
+        Stages of 'Metrics': "io.read.<disk|kdf|tag|sha256|keystream|xor|
+        from_json|verify>", and counters "io.read.bytes"
+        and "io.kdf.hits".
+        """
+        with _metrics.stage("io.read.disk"):
+            with open(self.path, "rb") as f:
+                _lock(f, exclusive=False)
+                format = f.readline().strip().upper()
+                line = f.readline()
+                # One buffer for the whole body, sliced without copying.
+                data = f.read()
         if format != b"KEYCHAIN":
             return _Result(Status.FORMAT_ERROR, None)
-        seed_digest = lines[1].strip().decode("utf-8")
-        if seed_digest != sha256(self.seed.encode("utf-8")).hexdigest():
-            return _Result(Status.PASSWORD_ERROR, None)
-        raw = b"".join(lines[2:])[:-1]
+        try:
+            header = _Header.parse(line)
+            generation = header.generation
+        except ValueError:
+            return _Result(Status.FORMAT_ERROR, None)
+        fields = header.fields
+        raw = memoryview(data)[:-1]
         length = len(raw)
-        set_seed(self.seed, version=2)
-        key = randbytes(length)
-        xor = int.from_bytes(raw, "big") ^ int.from_bytes(key, "big")
-        decrypted = xor.to_bytes(length, "big").decode("utf-8")
-        return _Result(Status.SUCCESS, KeyChain.from_json(decrypted))
+        _metrics.count("io.read.bytes", length)
+        if "cipher" in fields:
+            if fields["cipher"] != CIPHER:
+                return _Result(Status.FORMAT_ERROR, None)
+            try:
+                tag = fields["tag"]
+                keys = self.__derive(fields, "io.read.kdf", fields["check"])
+            except (KeyError, ValueError):
+                return _Result(Status.FORMAT_ERROR, None)
+            if keys is None:
+                return _Result(Status.PASSWORD_ERROR, None)
+            with _metrics.stage("io.read.tag"):
+                expected = _tag(keys, fields, raw)
+            if not hmac.compare_digest(expected, tag):
+                return _Result(Status.INTEGRITY_ERROR, None)
+            with _metrics.stage("io.read.keystream"):
+                key = _keystream(keys.cipher, fields["nonce"], length)
+            signing_key = keys.mac
+        else:
+            with _metrics.stage("io.read.sha256"):
+                digest = sha256(self.seed.encode("utf-8")).hexdigest()
+            if header.seed_digest != digest:
+                return _Result(Status.PASSWORD_ERROR, None)
+            with _metrics.stage("io.read.keystream"):
+                set_seed(self.seed, version=2)
+                key = randbytes(length)
+            signing_key = self.seed.encode("utf-8")
+        with _metrics.stage("io.read.xor"):
+            plain = _xor_into(raw, key)
+        try:
+            # Parsed from the buffer, zeroed whatever happens. The parser
+            # still decodes it to a 'str' which cannot be wiped, only freed.
+            with _metrics.stage("io.read.from_json"):
+                keychain = KeyChain.from_json(plain)
+        except (UnicodeDecodeError, ValueError, KeyError, TypeError):
+            return _Result(Status.INTEGRITY_ERROR, None)
+        finally:
+            plain[:] = bytes(len(plain))
+        if "root" in fields:
+            with _metrics.stage("io.read.verify"):
+                root = _sign(signing_key, keychain.digest)
+            if not hmac.compare_digest(root, fields["root"]):
+                return _Result(Status.INTEGRITY_ERROR, None)
+        self.generation = generation
+        if "cipher" in fields:
+            self.__params = {i: fields[i] for i in _KDF if i in fields}
+        return _Result(Status.SUCCESS, keychain)
 
+    def trace_read(self, limit: int = 10) -> _Trace:
+        """
+        Same as method 'read', under 'tracemalloc', reporting the peak
+        while loading and the top 'limit' lines by memory retained.
+
+        Tracing slows reading down several times. Allocations made before
+        are excluded if 'tracemalloc' is already tracing.
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            base = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            result = self.read()
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        after = after.filter_traces(filters)
+        before = before.filter_traces(filters)
+        top: List[Tuple[str, int]] = []
+        for _stat in after.compare_to(before, "lineno")[:limit]:
+            _frame = _stat.traceback[0]
+            top.append((f"{_frame.filename}:{_frame.lineno}", _stat.size_diff))
+        return _Trace(result, current - base, peak - base, top)
+
+    @_metrics.timed("io.write")
     def write(self, keychain: KeyChain) -> _Result:
-        raw = keychain.to_json().encode("utf-8")
+        """
+        Stages of 'Metrics': "io.write.<to_json|kdf|keystream|xor|sign|
+        disk>", and counters "io.write.bytes"
+        and "io.kdf.hits".
+        """
+        with _metrics.stage("io.write.to_json"):
+            raw = keychain.to_json().encode("utf-8")
         length = len(raw)
-        set_seed(self.seed, version=2)
-        key = randbytes(length)
-        xor = int.from_bytes(raw, "big") ^ int.from_bytes(key, "big")
-        encrypted = xor.to_bytes(length, "big")
+        _metrics.count("io.write.bytes", length)
+        seed_digest: Optional[str] = None
+        keys: Optional[_Keys] = None
+        if self.cipher == LEGACY:
+            fields: Dict[str, str] = {}
+            with _metrics.stage("io.write.keystream"):
+                set_seed(self.seed, version=2)
+                key = randbytes(length)
+            with _metrics.stage("io.write.xor"):
+                encrypted = _xor(raw, key)
+            with _metrics.stage("io.write.sign"):
+                seed_digest = sha256(self.seed.encode("utf-8")).hexdigest()
+                fields["root"] = _sign(
+                    self.seed.encode("utf-8"),
+                    keychain.digest
+                )
+        else:
+            if self.__params is None:
+                self.__params = _kdf_params()
+            fields = {"cipher": CIPHER, **self.__params}
+            fields["nonce"] = os.urandom(16).hex()
+            keys = self.__derive(fields, "io.write.kdf")
+            assert keys is not None
+            with _metrics.stage("io.write.keystream"):
+                key = _keystream(keys.cipher, fields["nonce"], length)
+            with _metrics.stage("io.write.xor"):
+                encrypted = _xor(raw, key)
+            with _metrics.stage("io.write.sign"):
+                fields["check"] = _check(keys)
+                fields["root"] = _sign(keys.mac, keychain.digest)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.path, "wb") as f:
-            seed_digest = sha256(self.seed.encode("utf-8")).hexdigest()
+        with _metrics.stage("io.write.disk"):
+            return self.__write(
+                keychain,
+                seed_digest,
+                fields,
+                encrypted,
+                keys
+            )
+
+    def __write(
+        self,
+        keychain: KeyChain,
+        seed_digest: Optional[str],
+        fields: Dict[str, str],
+        encrypted: bytes,
+        keys: Optional[_Keys]
+    ) -> _Result:
+        """
+        Field 'tag' is added here if 'keys' is given, since it covers 'gen',
+        which is only known under the lock.
+        """
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            # Never create a file only to report a conflict.
+            if self.generation:
+                return _Result(Status.CONFLICT_ERROR, None)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with open(fd, "r+b") as f:
+            _lock(f, exclusive=True)
+            generation = 0
+            if f.readline().strip().upper() == b"KEYCHAIN":
+                try:
+                    generation = _Header.parse(f.readline()).generation
+                except ValueError:
+                    return _Result(Status.FORMAT_ERROR, None)
+            if self.generation is not None and self.generation != generation:
+                return _Result(Status.CONFLICT_ERROR, None)
+            generation += 1
+            fields = {**fields, "gen": str(generation)}
+            if keys is not None:
+                fields["tag"] = _tag(keys, fields, encrypted)
+            header = _Header(seed_digest, fields)
+            f.seek(0)
+            f.truncate()
             f.write(b"KEYCHAIN\n")
-            f.write(seed_digest.encode("utf-8") + b"\n")
+            f.write(header.dump() + b"\n")
             f.write(encrypted + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.generation = generation
         return _Result(Status.SUCCESS, keychain)
@@ -0,0 +1,152 @@
+"""
+Opt-in timers and counters for hot paths, e.g. the stages of 'IO.read'.
+
+Disabled by default, in which case 'stage' returns a shared no-op context
+manager and 'timed' functions cost one attribute lookup more, so that
+instrumentation can stay in place.
+"""
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+from typing import (Any, Callable, ContextManager, Dict, List, NamedTuple,
+                    Optional, Set, TypeVar)
+
+F = TypeVar("F", bound=Callable)
+
+Hook = Callable[[str, float], Any]
+
+_NULL: ContextManager = nullcontext()
+
+
+class _Stat(NamedTuple):
+    calls: int  # records, i.e. stage runs or counter increments
+    total: float  # seconds for stages, sum of increments for counters
+    max: float
+
+
+class _Stage:
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.metrics.record(self.name, perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Singleton class.
+
+    Stages are named "<module>.<operation>.<stage>", e.g. "io.read.xor".
+    Every record is aggregated into 'snapshot' and passed to each hook as
+    '(name, value)', with value in seconds for stages.
+    """
+    __instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:
+            cls.__instance = super().__new__(cls)
+            cls.__instance.__setup()
+        return cls.__instance
+
+    def __setup(self) -> None:
+        self.__enabled: bool = False
+        self.__lock = threading.Lock()
+        self.__stats: Dict[str, _Stat] = {}
+        self.__counters: Set[str] = set()
+        self.__hooks: List[Hook] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    def enable(self, enabled: bool = True) -> "Metrics":
+        self.__enabled = enabled
+        return self
+
+    def add_hook(self, hook: Hook) -> "Metrics":
+        self.__hooks.append(hook)
+        return self
+
+    def remove_hook(self, hook: Hook) -> "Metrics":
+        self.__hooks.remove(hook)
+        return self
+
+    def reset(self) -> "Metrics":
+        with self.__lock:
+            self.__stats = {}
+            self.__counters = set()
+        return self
+
+    def snapshot(self) -> Dict[str, _Stat]:
+        with self.__lock:
+            return dict(self.__stats)
+
+    def record(self, name: str, value: float) -> None:
+        with self.__lock:
+            stat = self.__stats.get(name)
+            if stat is None:
+                self.__stats[name] = _Stat(1, value, value)
+            else:
+                self.__stats[name] = _Stat(
+                    stat.calls + 1,
+                    stat.total + value,
+                    max(stat.max, value)
+                )
+        for _hook in self.__hooks:
+            _hook(name, value)
+
+    def count(self, name: str, value: float = 1) -> None:
+        if self.__enabled:
+            self.__counters.add(name)
+            self.record(name, value)
+
+    def stage(self, name: str) -> ContextManager:
+        if not self.__enabled:
+            return _NULL
+        return _Stage(self, name)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """
+        Decorator timing every call as stage 'name'.
+        """
+        def decorator(func: F) -> F:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.__enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name):
+                    return func(*args, **kwargs)
+            return wrapper  # type: ignore
+        return decorator
+
+    def format(self, prefix: Optional[str] = None) -> str:
+        """
+        Table of 'snapshot', optionally only stages under 'prefix'.
+        """
+        list_: List[str] = [
+            f"{'stage':<32}{'count':>8}{'total ms':>12}{'max ms':>12}"
+        ]
+        for _name, _stat in sorted(self.snapshot().items()):
+            if prefix is not None and not _name.startswith(prefix):
+                continue
+            if _name in self.__counters:
+                # Not a stage, totals and maxima are shown as they are.
+                list_.append(
+                    f"{_name:<32}{_stat.calls:>8}"
+                    f"{_stat.total:>12g}{_stat.max:>12g}"
+                )
+                continue
+            list_.append(
+                f"{_name:<32}{_stat.calls:>8}"
+                f"{_stat.total * 1000:>12.3f}{_stat.max * 1000:>12.3f}"
+            )
+        return "\n".join(list_)
@@ -1,14 +1,17 @@
 from bisect import insort
 from collections import UserDict
-from copy import deepcopy
+from hashlib import sha256
+from types import MappingProxyType
 from typing import Callable, Dict, List, Optional, Union
 
-from ..utils import SEP_, TAB_, indent
 from .key import Key
+from .node import Node
 from .pair import Pair
+from .render import render_group
+from .snapshot import FrozenGroup, FrozenKey
 
 
-class Group(UserDict):
+class Group(UserDict, Node):
     """
     Filter arguments but not raise exception when initiate.
 
@@ -39,6 +42,7 @@ class Group(UserDict):
                 elif self.data[i.keyname].valid:
                     continue
                 self.data[i.keyname] = i
+        self._adopt_children()
         self.__deleted: bool = False
 
     def __setattr__(
@@ -67,9 +71,15 @@ class Group(UserDict):
         elif __name == f"_{CLASSNAME}__deleted":
             if not isinstance(__value, bool):
                 raise TypeError
+        elif __name in (f"_{CLASSNAME}__digest", f"_{CLASSNAME}__frozen"):
+            # Cache only, not a mutation.
+            return super().__setattr__(__name, __value)
         else:
             raise AttributeError
-        return super().__setattr__(__name, __value)
+        super().__setattr__(__name, __value)
+        if __name == "data":
+            self._adopt_children()
+        self._touch()
 
     def __getitem__(self, key: str) -> Key:
         return super().__getitem__(key)
@@ -91,7 +101,54 @@ class Group(UserDict):
             pass
         elif self.data[__key].valid:
             return
-        return super().__setitem__(__key, __item)
+        super().__setitem__(__key, __item)
+        __item._adopt(self)
+        self._touch()
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._touch()
+
+    def _update(self, dict_: Dict[str, Key]) -> None:
+        """
+        Insert keys of 'dict_', already validated and grouped by the
+        caller, i.e. '_Bulk', then touch once instead of once per key.
+        """
+        self.data.update(dict_)
+        for _key in dict_.values():
+            _key._adopt(self)
+        self._touch()
+
+    def _adopt_children(self) -> None:
+        for _key in self.data.values():
+            _key._adopt(self)
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        # Caches only, and images hold unpicklable 'MappingProxyType'.
+        state[f"_{self.__class__.__name__}__digest"] = None
+        state[f"_{self.__class__.__name__}__frozen"] = None
+        return state
+
+    def _invalidate(self) -> None:
+        self.__digest: Optional[str] = None
+        self.__frozen: Optional[FrozenGroup] = None
+
+    def _freeze(self) -> Optional[FrozenGroup]:
+        """Immutable image, or None if invalid."""
+        if self.__deleted:
+            return None
+        if self.__frozen is None:
+            dict_: Dict[str, FrozenKey] = {}
+            for _key in self.data.values():
+                _frozen = _key._freeze()
+                if _frozen is not None:
+                    dict_[_key.keyname] = _frozen
+            self.__frozen = FrozenGroup(
+                self.__groupname,
+                MappingProxyType(dict_)
+            )
+        return self.__frozen
 
     def __lt__(self, __o: "Group") -> bool:
         """For 'bisect.insort' only."""
@@ -123,9 +180,11 @@ class Group(UserDict):
 
     def add_key(self, *keys: Key, force: bool = False) -> "Group":
         for _key in keys:
-            if force:
+            if force or _key.group is None:
                 _key.group = self.__groupname
             self.data[_key.keyname] = _key
+            _key._adopt(self)
+        self._touch()
         return self
 
     def delete(self) -> "Group":
@@ -138,12 +197,14 @@ class Group(UserDict):
 
     def outcast(self) -> List[Key]:
         list_: List[Key] = []
-        for _keyname, _key in deepcopy(self.data).items():
+        for _keyname, _key in [*self.data.items()]:
             if _key.group is None:
                 _key.group = self.__groupname
                 continue
             if _key.group != self.__groupname:
                 list_.append(self.data.pop(_keyname))
+        if list_:
+            self._touch()
         return list_
 
     def aspair(self, *, valid_only: bool = True) -> Optional[Pair]:
@@ -162,25 +223,37 @@ class Group(UserDict):
 
     export: Callable = aspair
 
-    def __repr__(self) -> str:
+    @classmethod
+    def from_pair(cls, pair: Pair) -> "Group":
+        """Inverse of method 'aspair'."""
+        if not isinstance(pair.key, str):
+            raise TypeError
+        groupname: str = pair.key
+        dict_: dict = pair.value
+        instance = cls(groupname)
+        for i, j in dict_.items():
+            instance.add_key(Key.from_pair(Pair(i, j)))
+        return instance
+
+    @property
+    def digest(self) -> Optional[str]:
+        """
+        Hex sha256 over digests of valid keys, or None if invalid.
+
+        Cached until the group or anything in it is mutated.
+        """
         if self.__deleted:
-            return f"{self.groupname}(__deleted__)"
-        else:
-            valid_keys = self.valid_keys
-            if not valid_keys:
-                repr_ = (f"{self.groupname}()")
-            elif len(valid_keys) <= 4:
-                repr_ = (
-                    f"{self.groupname}("
-                    f"{TAB_}"
-                    f"{SEP_.join(indent(repr(i)) for i in valid_keys)}\n)"
-                )
-            else:
-                repr_ = (
-                    f"{self.groupname}("
-                    f"{TAB_}{indent(repr(valid_keys[0]))}"
-                    f"{SEP_}{indent(repr(valid_keys[1]))}"
-                    f"{SEP_}..."
-                    f"{SEP_}{indent(repr(valid_keys[-1]))}\n)"
-                )
-            return repr_
+            return None
+        if self.__digest is None:
+            hash_ = sha256(self.__groupname.encode("utf-8"))
+            for _key in sorted(self.data.values()):
+                _digest = _key.digest
+                if _digest is not None:
+                    hash_.update(b"\n" + _digest.encode("utf-8"))
+            self.__digest = hash_.hexdigest()
+        return self.__digest
+
+    def __repr__(self) -> str:
+        list_: List[str] = []
+        render_group(self, list_)
+        return "".join(list_)
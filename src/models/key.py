@@ -1,9 +1,14 @@
+import json
 from bisect import insort
 from collections import UserDict, UserList
+from hashlib import sha256
+from types import MappingProxyType
 from typing import Callable, Dict, Iterable, List, Optional, Union
 
-from ..utils import SEP_, SEP__, TAB_, TAB__, indent
+from .node import Node
 from .pair import Pair
+from .render import render_key
+from .snapshot import FrozenKey, FrozenUser
 from .user import User
 
 __all__ = ["Key"]
@@ -11,7 +16,7 @@ __all__ = ["Key"]
 NoneType = type(None)
 
 
-class _URLList(UserList):
+class _URLList(UserList, Node):
     """
     Filter arguments but not raise exception when initiate or call
     method 'insort'.
@@ -37,18 +42,21 @@ class _URLList(UserList):
                 insort(list_, i.rstrip("/"))
         else:
             raise AttributeError
-        return super().__setattr__(__name, list_)
+        super().__setattr__(__name, list_)
+        self._touch()
 
     def insort(self, url: str) -> None:
         if isinstance(url, str) and url not in self.data:
             insort(self.data, url.rstrip("/"))
+            self._touch()
 
     insert: Callable = insort
 
     def append(self, url: str) -> None:
         """Drprecated."""
         if isinstance(url, str) and url not in self.data:
-            return super().append(url.rstrip("/"))
+            super().append(url.rstrip("/"))
+            self._touch()
 
     def extend(self, other: Iterable[str]) -> None:
         """Drprecated."""
@@ -56,10 +64,11 @@ class _URLList(UserList):
         for i in other:
             if isinstance(i, str) and i not in self.data:
                 list_.append(i.rstrip("/"))
-        return super().extend(list_)
+        super().extend(list_)
+        self._touch()
 
 
-class _UserDict(UserDict):
+class _UserDict(UserDict, Node):
     """
     Filter arguments but not raise exception when initiate.
 
@@ -78,6 +87,7 @@ class _UserDict(UserDict):
                 elif self.data[i.username].valid:
                     continue
                 self.data[i.username] = i
+        self._adopt_children()
 
     def __setattr__(self, __name: str, __value: Dict[str, User]) -> None:
         if __name == "data":
@@ -92,7 +102,9 @@ class _UserDict(UserDict):
                     raise ValueError
         else:
             raise AttributeError
-        return super().__setattr__(__name, __value)
+        super().__setattr__(__name, __value)
+        self._adopt_children()
+        self._touch()
 
     def __getitem__(self, key: str) -> User:
         return super().__getitem__(key)
@@ -110,10 +122,20 @@ class _UserDict(UserDict):
             pass
         elif self.data[__key].valid:
             return
-        return super().__setitem__(__key, __item)
+        super().__setitem__(__key, __item)
+        __item._adopt(self)
+        self._touch()
 
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._touch()
 
-class Key:
+    def _adopt_children(self) -> None:
+        for _user in self.data.values():
+            _user._adopt(self)
+
+
+class Key(Node):
 
     def __init__(
         self,
@@ -158,15 +180,56 @@ class Key:
         elif __name == "url_list":
             if not isinstance(__value, _URLList):
                 raise TypeError
+            __value._adopt(self)
         elif __name == "user_dict":
             if not isinstance(__value, _UserDict):
                 raise TypeError
+            __value._adopt(self)
         elif __name == f"_{CLASSNAME}__deleted":
             if not isinstance(__value, bool):
                 raise TypeError
+        elif __name in (f"_{CLASSNAME}__digest", f"_{CLASSNAME}__frozen"):
+            # Cache only, not a mutation.
+            return super().__setattr__(__name, __value)
         else:
             raise AttributeError
-        return super().__setattr__(__name, __value)
+        super().__setattr__(__name, __value)
+        self._touch()
+
+    def _adopt_children(self) -> None:
+        self.url_list._adopt(self)
+        self.user_dict._adopt(self)
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        # Caches only, and images hold unpicklable 'MappingProxyType'.
+        state[f"_{self.__class__.__name__}__digest"] = None
+        state[f"_{self.__class__.__name__}__frozen"] = None
+        return state
+
+    def _invalidate(self) -> None:
+        self.__digest: Optional[str] = None
+        self.__frozen: Optional[FrozenKey] = None
+
+    def _freeze(self) -> Optional[FrozenKey]:
+        """Immutable image, or None if invalid."""
+        if self.__deleted:
+            return None
+        if self.__frozen is None:
+            dict_: Dict[str, FrozenUser] = {}
+            for i in self.user_dict.values():
+                _user: User = i
+                _frozen = _user._freeze()
+                if _frozen is not None:
+                    dict_[_user.username] = _frozen
+            self.__frozen = FrozenKey(
+                self.keyname,
+                self.group,
+                self.description,
+                tuple(sorted(self.url_list)),
+                MappingProxyType(dict_)
+            )
+        return self.__frozen
 
     def __lt__(self, __o: "Key") -> bool:
         """For 'bisect.insort' only."""
@@ -192,7 +255,6 @@ class Key:
             self.user_dict[_user.username] = _user
         return self
 
-
     def delete(self) -> "Key":
         self.__deleted = True
         return self
@@ -222,36 +284,43 @@ class Key:
 
     export: Callable = aspair
 
+    @classmethod
+    def from_pair(cls, pair: Pair) -> "Key":
+        """Inverse of method 'aspair'."""
+        if not isinstance(pair.key, str):
+            raise TypeError
+        keyname: str = pair.key
+        dict_: dict = pair.value
+        instance = cls(
+            keyname,
+            description=dict_["description"],
+            url_list=dict_["url"],
+        )
+        for i in dict_["userlist"]:
+            instance.add_user(User.from_dict(i))
+        return instance
+
+    @property
+    def digest(self) -> Optional[str]:
+        """
+        Hex sha256 of the export, or None if invalid.
+
+        Cached until the key or anything in it is mutated.
+        """
+        if self.__digest is None:
+            _pair = self.aspair()
+            if _pair is None:
+                return None
+            # Order of exported fields is fixed, no need to sort keys.
+            string_ = json.dumps(
+                _pair,
+                ensure_ascii=False,
+                separators=(",", ":")
+            )
+            self.__digest = sha256(string_.encode("utf-8")).hexdigest()
+        return self.__digest
+
     def __repr__(self) -> str:
-        CLASSNAME = self.__class__.__name__
-        if self.__deleted:
-            return f"{CLASSNAME}(__deleted__)"
-        else:
-            valid_users = self.valid_users
-            if not valid_users:
-                repr_ = (
-                    f"{CLASSNAME}("
-                    f"{TAB_}keyname: '{self.keyname}'"
-                    f"{SEP_}userlist: []\n)"
-                )
-            elif len(valid_users) <= 4:
-                repr_ = (
-                    f"{CLASSNAME}("
-                    f"{TAB_}keyname: '{self.keyname}'"
-                    f"{SEP_}userlist: ["
-                    f"{TAB__}"
-                    f"{SEP__.join(indent(repr(i), 2) for i in valid_users)}"
-                    f"{TAB_}]\n)"
-                )
-            else:
-                repr_ = (
-                    f"{CLASSNAME}("
-                    f"{TAB_}keyname: '{self.keyname}'"
-                    f"{SEP_}userlist: ["
-                    f"{TAB__}{indent(repr(valid_users[0]), 2)}"
-                    f"{SEP__}{indent(repr(valid_users[1]), 2)}"
-                    f"{SEP__}..."
-                    f"{SEP__}{indent(repr(valid_users[-1]), 2)}"
-                    f"{TAB_}]\n)"
-                )
-            return repr_
+        list_: List[str] = []
+        render_key(self, list_)
+        return "".join(list_)
@@ -1,26 +1,265 @@
 import csv
+import hashlib
 import json
 import re
-from bisect import insort
+import secrets
+from bisect import bisect_left, bisect_right, insort
 from collections import Counter, UserDict
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import (Any, Callable, ContextManager, Dict, Iterable, Iterator,
+                    List, NamedTuple, Optional, Tuple, TypeVar, Union, cast)
 
-from ..utils import SEP_, TAB_, indent
+from ..generator import PasswordGenerator
+from ..metrics import Metrics
+from ..utils import RWLock, estimate_entropy, timestamp
 from .group import Group
 from .key import Key
+from .memory import _MemoryReport, memory_report
+from .merge import merge_group
+from .node import Node
+from .pair import Pair
+from .render import render_keychain
+from .snapshot import FrozenGroup, Snapshot
 from .user import User
 
 
-class KeyChain(UserDict):
+F = TypeVar("F", bound=Callable)
+
+_metrics = Metrics()
+
+
+class _Rotation(NamedTuple):
+    timestamp: float
+    rotated: List[Tuple[str, str, str]]  # (groupname, keyname, username)
+
+
+class _Change(NamedTuple):
+    kind: str  # "added", "removed" or "changed"
+    groupname: str
+    keyname: Optional[str]  # None if the whole group is added or removed
+
+
+class _Finding(NamedTuple):
+    kind: str  # "weak" or "reused"
+    entries: List[Tuple[str, str, str]]  # (groupname, keyname, username)
+    entropy: float
+
+
+def _reader(method: F) -> F:
+    @wraps(method)
+    def wrapper(self: "KeyChain", *args, **kwargs):
+        with self.reading():
+            return method(self, *args, **kwargs)
+    return cast(F, wrapper)
+
+
+def _writer(method: F) -> F:
+    @wraps(method)
+    def wrapper(self: "KeyChain", *args, **kwargs):
+        with self.writing():
+            return method(self, *args, **kwargs)
+    return cast(F, wrapper)
+
+
+def _generate_many(
+    mode: Optional[Iterable],
+    n: int,
+    unique: bool
+) -> List[str]:
+    """For 'ProcessPoolExecutor' only, which requires a picklable callable."""
+    return PasswordGenerator(mode).generate_many(n, unique=unique)
+
+
+class _Bulk:
+    """
+    Stage insertions, deletions and recoveries of keys and groups, then
+    apply them to 'KeyChain' at once.
+
+    All staged operations are validated in one pass before any of them is
+    applied, therefore an exception leaves the keychain untouched. Each
+    affected group is updated with its staged keys only, and invalidated
+    once, so cached state is rebuilt once, on the next read.
+
+    Warning:
+        - use method 'KeyChain.bulk' instead of initiating directly.
+    """
+    def __init__(self, keychain: "KeyChain") -> None:
+        self.__keychain: KeyChain = keychain
+        self.__staged: List[Tuple[str, Any]] = []
+
+    def __enter__(self) -> "_Bulk":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.__staged.clear()
+
+    def add_key(self, *keys: Key) -> "_Bulk":
+        for _key in keys:
+            self.__staged.append(("add", _key))
+        return self
+
+    def delete(self, groupname: str, keyname: Optional[str] = None) -> "_Bulk":
+        """
+        Delete the group if 'keyname' is None, otherwise the key.
+        """
+        self.__staged.append(("delete", (groupname, keyname)))
+        return self
+
+    def recover(
+        self,
+        groupname: str,
+        keyname: Optional[str] = None
+    ) -> "_Bulk":
+        """
+        Recover the group if 'keyname' is None, otherwise the key.
+        """
+        self.__staged.append(("recover", (groupname, keyname)))
+        return self
+
+    def __validate(self) -> None:
+        data = self.__keychain.data
+        groups = set(data)
+        keys = set()
+        for _op, _arg in self.__staged:
+            if _op == "add":
+                if not isinstance(_arg, Key):
+                    raise TypeError
+                _groupname = "Default" if _arg.group is None else _arg.group
+                groups.add(_groupname)
+                keys.add((_groupname, _arg.keyname))
+                continue
+            _groupname, _keyname = _arg
+            if not isinstance(_groupname, str):
+                raise TypeError
+            if _keyname is not None and not isinstance(_keyname, str):
+                raise TypeError
+            if _groupname not in groups:
+                raise KeyError(_groupname)
+            if _keyname is None:
+                continue
+            if (_groupname, _keyname) in keys:
+                continue
+            if _groupname not in data or _keyname not in data[_groupname]:
+                raise KeyError(_keyname)
+
+    def commit(self) -> "KeyChain":
+        with self.__keychain.writing():
+            return self.__commit()
+
+    def __commit(self) -> "KeyChain":
+        self.__validate()
+        data = self.__keychain.data
+        pending: Dict[str, Dict[str, Key]] = {}
+        for _op, _arg in self.__staged:
+            if _op == "add":
+                _key: Key = _arg
+                if _key.group is None:
+                    _key.group = "Default"
+                _groupname = _key.group
+                _keyname = _key.keyname
+            else:
+                _groupname, _keyname = _arg
+            if _groupname not in data:
+                data[_groupname] = Group(_groupname)
+                data[_groupname]._adopt(self.__keychain)
+            if _groupname not in pending:
+                pending[_groupname] = {}
+            dict_ = pending[_groupname]
+            _old = dict_.get(_keyname, data[_groupname].data.get(_keyname))
+            if _op == "add":
+                if _key.valid:
+                    pass
+                elif _old is None:
+                    pass
+                elif _old.valid:
+                    continue
+                dict_[_keyname] = _key
+            elif _keyname is None:
+                getattr(data[_groupname], _op)()
+            else:
+                getattr(_old, _op)()
+        for _groupname, dict_ in pending.items():
+            data[_groupname]._update(dict_)
+        self.__staged.clear()
+        return self.__keychain
+
+
+class _Timeline:
+    """
+    Timestamps of valid users of valid keys, sorted, with parallel lists
+    of users and keys. Built once, then updated in place by 'update' as
+    users change, by bisect instead of a full rebuild.
+    """
+
+    def __init__(self, keys: Iterable[Key]) -> None:
+        list_: List[Tuple[float, User, Key]] = []
+        for _key in keys:
+            for i in _key.user_dict.values():
+                _user: User = i
+                if _user.valid:
+                    list_.append((_user.timestamp, _user, _key))
+        list_.sort(key=lambda x: x[0])
+        self.stamps: List[float] = [i for i, _, _ in list_]
+        self.users: List[User] = [j for _, j, _ in list_]
+        self.keys: List[Key] = [k for _, _, k in list_]
+        # id of user -> (timestamp indexed under, keys indexed under)
+        self.__indexed: Dict[int, Tuple[float, List[Key]]] = {}
+        for _stamp, _user, _key in list_:
+            self.__indexed.setdefault(id(_user), (_stamp, []))[1].append(_key)
+
+    def update(self, user: User, key: Optional[Key]) -> None:
+        """
+        Re-index 'user' after a change, under the keys it was indexed
+        under, or under 'key' if it was not indexed.
+        """
+        entry = self.__indexed.pop(id(user), None)
+        if entry is not None:
+            stamp, keys = entry
+            i = bisect_left(self.stamps, stamp)
+            while i < len(self.stamps) and self.stamps[i] == stamp:
+                if self.users[i] is user:
+                    del self.stamps[i], self.users[i], self.keys[i]
+                    continue
+                i += 1
+        else:
+            keys = [] if key is None else [key]
+        if not user.valid or not keys:
+            return
+        stamp = user.timestamp
+        for _key in keys:
+            i = bisect_right(self.stamps, stamp)
+            self.stamps.insert(i, stamp)
+            self.users.insert(i, user)
+            self.keys.insert(i, _key)
+        self.__indexed[id(user)] = (stamp, keys)
+
+
+class KeyChain(UserDict, Node):
     """
     Filter arguments but not raise exception when initiate.
 
+    Valid users are indexed by timestamp for time range queries. The index
+    is built once on demand, then updated in place as users change. Any
+    other mutation, e.g. of a key or group, drops it for a full rebuild.
+
+    Thread-safe mode is off by default, see method 'set_thread_safe'.
+
     Warning:
         - attribute 'data' of 'KeyChain' instance is not recommended to
           access from outer scope.
     """
     def __init__(self, *groups: Union[str, Group]) -> None:
+        self.__timeline: Optional[_Timeline] = None
+        self.__digest: Optional[str] = None
+        self.__snapshot: Optional[Snapshot] = None
+        self.__lock: Optional[RWLock] = None
         self.data: Dict[str, Group] = {}
         for i in groups:
             if isinstance(i, str) and i not in self.data:
@@ -33,6 +272,7 @@ class KeyChain(UserDict):
                 elif self.data[i.groupname].valid:
                     continue
                 self.data[i.groupname] = i
+        self._adopt_children()
 
     def __setattr__(self, __name: str, __value: Any) -> None:
         if __name == "data":
@@ -45,11 +285,15 @@ class KeyChain(UserDict):
                     raise TypeError
                 if i != j.groupname:
                     raise ValueError
-        return super().__setattr__(__name, __value)
+        super().__setattr__(__name, __value)
+        if __name == "data":
+            self._adopt_children()
+            self._touch()
 
     def __getitem__(self, key: str) -> Group:
         return super().__getitem__(key)
 
+    @_writer
     def __setitem__(self, __key: str, __item: Group) -> None:
         if not isinstance(__key, str):
             raise TypeError
@@ -63,9 +307,123 @@ class KeyChain(UserDict):
             pass
         elif self.data[__key].valid:
             return
-        return super().__setitem__(__key, __item)
+        super().__setitem__(__key, __item)
+        __item._adopt(self)
+        self._touch()
+
+    @_writer
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._touch()
+
+    def _adopt_children(self) -> None:
+        for _group in self.data.values():
+            _group._adopt(self)
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state[f"_{self.__class__.__name__}__lock"] = None
+        # Indexed by id, which copies do not share.
+        state[f"_{self.__class__.__name__}__timeline"] = None
+        # Caches only, and a snapshot holds unpicklable 'MappingProxyType'.
+        state[f"_{self.__class__.__name__}__digest"] = None
+        state[f"_{self.__class__.__name__}__snapshot"] = None
+        return state
+
+    def _invalidate(self) -> None:
+        self.__digest = None
+        self.__snapshot = None
+
+    def _touched(self, origin: Node) -> None:
+        """
+        Update the timeline in place if a user changed, e.g. its timestamp
+        or validity, otherwise drop it, since keys or groups may have been
+        added, removed, deleted or recovered.
+        """
+        if self.__timeline is None:
+            return
+        if not isinstance(origin, User):
+            self.__timeline = None
+            return
+        key = None
+        user_dict = origin._owner()
+        _key = None if user_dict is None else user_dict._owner()
+        group = None if _key is None else _key._owner()
+        if isinstance(_key, Key) and _key.valid:
+            if isinstance(group, Group) and group.valid:
+                if group._owner() is self:
+                    key = _key
+        self.__timeline.update(origin, key)
+
+    @_metrics.timed("keychain.snapshot")
+    @_reader
+    def snapshot(self) -> Snapshot:
+        """
+        Immutable view of valid groups, keys and users, for exports and
+        audits running while the keychain keeps being mutated.
+
+        Images are shared with previous snapshots wherever nothing changed,
+        so taking a snapshot is O(1) if nothing changed since the last one,
+        otherwise only the changed path is rebuilt, never a deepcopy.
+        """
+        if self.__snapshot is None:
+            dict_: Dict[str, FrozenGroup] = {}
+            for _groupname, _group in self.data.items():
+                _frozen = _group._freeze()
+                if _frozen is not None:
+                    dict_[_groupname] = _frozen
+            self.__snapshot = Snapshot(dict_)
+        return self.__snapshot
+
+    def set_thread_safe(self, thread_safe: bool = True) -> "KeyChain":
+        """
+        In thread-safe mode, methods of 'KeyChain' take a readers-writer
+        lock. Readers hold it throughout, except generators, e.g. methods
+        'iter_key' and 'audit', which copy what they iterate over, down to
+        users, under the lock. Mutations made directly on groups, keys or
+        users should be wrapped in 'with keychain.writing():'.
+
+        Do not toggle while other threads use the keychain.
+        """
+        self.__lock = RWLock() if thread_safe else None
+        return self
+
+    @property
+    def thread_safe(self) -> bool:
+        return self.__lock is not None
+
+    def reading(self) -> ContextManager:
+        if self.__lock is None:
+            return nullcontext()
+        return self.__lock.reading()
+
+    def writing(self) -> ContextManager:
+        if self.__lock is None:
+            return nullcontext()
+        return self.__lock.writing()
 
     @property
+    @_metrics.timed("keychain.digest")
+    @_reader
+    def digest(self) -> str:
+        """
+        Root hex sha256 over digests of valid groups, like a Merkle tree.
+
+        Cached until anything in the keychain is mutated. Since digests of
+        groups and keys are cached likewise, recomputing after a mutation
+        only rehashes the changed path.
+        """
+        if self.__digest is None:
+            hash_ = sha256()
+            for _groupname in sorted(self.data):
+                _digest = self.data[_groupname].digest
+                if _digest is not None:
+                    hash_.update(_digest.encode("utf-8") + b"\n")
+            self.__digest = hash_.hexdigest()
+        return self.__digest
+
+    @property
+    @_reader
     def valid_groups(self) -> List[Group]:
         list_: List[Group] = []
         for _group in self.data.values():
@@ -73,6 +431,7 @@ class KeyChain(UserDict):
                 insort(list_, _group)
         return list_
 
+    @_writer
     def add_key(self, *keys: Key) -> "KeyChain":
         for _key in keys:
             if _key.group is None:
@@ -81,8 +440,29 @@ class KeyChain(UserDict):
                 self.data[_key.group][_key.keyname] = _key
             else:
                 self.data[_key.group] = Group(_key.group, _key)
+                self.data[_key.group]._adopt(self)
+                self._touch()
+        return self
+
+    def add_keys(self, keys: Iterable[Key]) -> "KeyChain":
+        """
+        Same as method 'add_key', but validate all keys in one pass and
+        update each group only once. Recommended for importing.
+        """
+        with self.bulk() as bulk:
+            bulk.add_key(*keys)
         return self
 
+    def bulk(self) -> _Bulk:
+        """
+        Return a context manager staging mutations, which will be applied
+        when exiting without exception. For example:
+            >   with keychain.bulk() as bulk:
+            >       bulk.add_key(*keys)
+            >       bulk.delete("Default", "foo")
+        """
+        return _Bulk(self)
+
     def add_new_key(
         self,
         keyname: str,
@@ -99,6 +479,7 @@ class KeyChain(UserDict):
         key = Key(keyname, user, group=group, description=description, url=url)
         return self.add_key(key)
 
+    @_reader
     def get_all_keys(self, *, valid_only: bool = True) -> List[Key]:
         list_: List[Key] = []
         for _group in self.data.values():
@@ -111,6 +492,8 @@ class KeyChain(UserDict):
                 list_.append(_key)
         return list_
 
+    @_metrics.timed("keychain.get_key")
+    @_reader
     def get_key(
         self,
         pattern: str,
@@ -123,52 +506,287 @@ class KeyChain(UserDict):
         """
         Argument 'pattern' should be r-string.
         """
-        list_: List[Key] = []
-        if fullmatch:
-            func = re.fullmatch
-        else:
-            func = re.search
+        return [*self.iter_key(
+            pattern,
+            keyname_only=keyname_only,
+            regex_on=regex_on,
+            fullmatch=fullmatch,
+            valid_only=valid_only
+        )]
+
+    def iter_key(
+        self,
+        pattern: str,
+        *,
+        keyname_only: bool = True,
+        regex_on: bool = False,
+        fullmatch: bool = False,
+        valid_only: bool = True
+    ) -> Iterator[Key]:
+        """
+        Lazy version of method 'get_key', yielding each match as soon as it
+        is found, so that callers showing only the first few matches never
+        scan the rest.
+        """
         if not regex_on:
             pattern = re.escape(pattern)
-        for _key in self.get_all_keys(valid_only=valid_only):
-            if func(pattern, _key.keyname) is not None:
-                list_.append(_key)
+        compiled = re.compile(pattern)
+        if fullmatch:
+            func = compiled.fullmatch
+        else:
+            func = compiled.search
+        with self.reading():
+            # Snapshot down to users, since a lock must not be held across
+            # yield, while a writer may mutate any container meanwhile.
+            list_: List[Tuple[Key, List[str], List[User]]] = [
+                (_key, [], []) if keyname_only else
+                (_key, [*_key.url_list], [*_key.user_dict.values()])
+                for _key in self.get_all_keys(valid_only=valid_only)
+            ]
+        for _key, _urls, _users in list_:
+            if func(_key.keyname) is not None:
+                yield _key
                 continue
             if keyname_only:
                 continue
             if _key.description is not None:
-                if func(pattern, _key.description) is not None:
-                    list_.append(_key)
+                if func(_key.description) is not None:
+                    yield _key
                     continue
-            _flag = False
-            for _url in _key.url_list:
-                if func(pattern, _url) is not None:
-                    list_.append(_key)
-                    _flag = True
-                    break
-            if _flag:
+            if any(func(_url) is not None for _url in _urls):
+                yield _key
                 continue
-            for i in _key.user_dict.values():
+            for i in _users:
                 _user: User = i
-                if func(pattern, _user.username) is not None:
-                    list_.append(_key)
+                if func(_user.username) is not None:
+                    yield _key
                     break
-                if func(pattern, _user.password) is not None:
-                    list_.append(_key)
+                if func(_user.password) is not None:
+                    yield _key
                     break
                 if _user.notes is not None:
-                    if func(pattern, _user.notes) is not None:
-                        list_.append(_key)
+                    if func(_user.notes) is not None:
+                        yield _key
                         break
+
+    @_metrics.timed("keychain.rotate")
+    @_writer
+    def rotate(
+        self,
+        group: Optional[str] = None,
+        mode: Optional[Iterable] = None,
+        predicate: Optional[Callable[[Key, User], bool]] = None,
+        *,
+        unique: bool = False,
+        processes: Optional[int] = None
+    ) -> _Rotation:
+        """
+        Replace passwords of all valid users in 'group' (or in all groups
+        if 'group' is None) for which 'predicate(key, user)' is True.
+
+        New passwords are generated in batch, across a process pool of
+        'processes' workers if it is greater than 1, and applied with one
+        shared timestamp. Save the keychain once afterwards.
+        """
+        generator = PasswordGenerator(mode)  # Raise ValueError early.
+        targets: List[Tuple[Key, User]] = []
+        for _key in self.get_all_keys():
+            if group is not None and _key.group != group:
+                continue
+            for _user in _key.valid_users:
+                if predicate is None or predicate(_key, _user):
+                    targets.append((_key, _user))
+        n = len(targets)
+        if processes is None or processes <= 1 or n < processes:
+            passwords = generator.generate_many(n, unique=unique)
+        else:
+            # Imported here, since it costs more than the rest at startup.
+            from concurrent.futures import ProcessPoolExecutor
+            size = -(-n // processes)
+            chunks = [min(size, n - i) for i in range(0, n, size)]
+            with ProcessPoolExecutor(processes) as executor:
+                passwords = []
+                for list_ in executor.map(
+                    _generate_many,
+                    [generator.mode] * len(chunks),
+                    chunks,
+                    [unique] * len(chunks)
+                ):
+                    passwords.extend(list_)
+        now = timestamp()
+        rotated: List[Tuple[str, str, str]] = []
+        for (_key, _user), _password in zip(targets, passwords):
+            _user.rotate(_password, now)
+            assert _key.group is not None  # Set once in a keychain.
+            rotated.append((_key.group, _key.keyname, _user.username))
+        return _Rotation(now, rotated)
+
+    def audit(
+        self,
+        threshold: float = 60.0,
+        *,
+        valid_only: bool = True
+    ) -> Iterator[_Finding]:
+        """
+        Yield a "weak" finding as soon as a password estimated below
+        'threshold' bits is met, then a "reused" finding for each password
+        shared by more than one user.
+
+        Passwords are indexed in one pass by a fingerprint, i.e. a keyed
+        blake2b digest with a random key per audit, so that the index never
+        holds plaintext. Strength of a reused password is estimated once.
+        """
+        salt = secrets.token_bytes(16)
+        index: Dict[bytes, List[Tuple[str, str, str]]] = {}
+        strength: Dict[bytes, float] = {}
+        with self.reading():
+            # Snapshot, since a lock must not be held across yield.
+            snapshot = [
+                (_key, [*_key.user_dict.values()])
+                for _key in self.get_all_keys(valid_only=valid_only)
+            ]
+        for _key, _users in snapshot:
+            for i in _users:
+                _user: User = i
+                if valid_only and not _user.valid:
+                    continue
+                with _user.secret.view() as view_:
+                    _fingerprint = hashlib.blake2b(
+                        view_,
+                        key=salt,
+                        digest_size=16
+                    ).digest()
+                assert _key.group is not None  # Set once in a keychain.
+                _entry = (_key.group, _key.keyname, _user.username)
+                if _fingerprint in index:
+                    index[_fingerprint].append(_entry)
+                    continue
+                index[_fingerprint] = [_entry]
+                _entropy = estimate_entropy(_user.password)
+                strength[_fingerprint] = _entropy
+                if _entropy < threshold:
+                    yield _Finding("weak", [_entry], _entropy)
+        for _fingerprint, _entries in index.items():
+            if len(_entries) > 1:
+                yield _Finding("reused", _entries, strength[_fingerprint])
+
+    def __get_timeline(self) -> _Timeline:
+        if self.__timeline is None:
+            self.__timeline = _Timeline(self.get_all_keys())
+        return self.__timeline
+
+    @_reader
+    def keys_older_than(self, datetime_: datetime) -> List[Key]:
+        """
+        Valid keys with any valid user not changed since 'datetime_',
+        the oldest first.
+        """
+        timeline = self.__get_timeline()
+        stop = bisect_left(timeline.stamps, timestamp(datetime_))
+        return [*dict.fromkeys(timeline.keys[:stop])]
+
+    @_reader
+    def changed_between(self, start: datetime, end: datetime) -> List[Key]:
+        """
+        Valid keys with any valid user changed in [start, end),
+        the earliest first.
+        """
+        timeline = self.__get_timeline()
+        start_ = bisect_left(timeline.stamps, timestamp(start))
+        stop = bisect_left(timeline.stamps, timestamp(end))
+        return [*dict.fromkeys(timeline.keys[start_:stop])]
+
+    @_metrics.timed("keychain.diff")
+    @_reader
+    def diff(self, other: "KeyChain") -> List[_Change]:
+        """
+        Changes of valid groups and keys from 'self' to 'other'.
+
+        Groups with the same digest are skipped without comparing keys.
+        """
+        list_: List[_Change] = []
+        for _groupname in sorted({*self.data, *other.data}):
+            _old = self.data.get(_groupname)
+            _new = other.data.get(_groupname)
+            _old_digest = None if _old is None else _old.digest
+            _new_digest = None if _new is None else _new.digest
+            if _old_digest == _new_digest:
+                continue
+            if _old is None or _old_digest is None:
+                list_.append(_Change("added", _groupname, None))
+                continue
+            if _new is None or _new_digest is None:
+                list_.append(_Change("removed", _groupname, None))
+                continue
+            for _keyname in sorted({*_old.data, *_new.data}):
+                _old_key = _old.data.get(_keyname)
+                _new_key = _new.data.get(_keyname)
+                _old_digest = None if _old_key is None else _old_key.digest
+                _new_digest = None if _new_key is None else _new_key.digest
+                if _old_digest == _new_digest:
+                    continue
+                if _old_digest is None:
+                    kind = "added"
+                elif _new_digest is None:
+                    kind = "removed"
+                else:
+                    kind = "changed"
+                list_.append(_Change(kind, _groupname, _keyname))
         return list_
 
+    @classmethod
+    @_metrics.timed("keychain.merge")
+    def merge(
+        cls,
+        base: "KeyChain",
+        ours: "KeyChain",
+        theirs: "KeyChain"
+    ) -> "KeyChain":
+        """
+        Three-way merge into a new keychain. Unchanged subtrees are skipped
+        by digest, and conflicting users are resolved by timestamp.
+        """
+        instance = cls()
+        for _groupname in {**base.data, **ours.data, **theirs.data}:
+            _group = merge_group(
+                base.data.get(_groupname),
+                ours.data.get(_groupname),
+                theirs.data.get(_groupname)
+            )
+            if _group is not None:
+                instance[_groupname] = _group
+        return instance
+
+    @_writer
     def regrouping(self) -> "KeyChain":
         outcasts: List[Key] = []
         for _group in self.data.values():
             outcasts.extend(_group.outcast())
         return self.add_key(*outcasts)
 
+    @_reader
+    def memory_report(self) -> _MemoryReport:
+        """
+        Deep size in bytes by 'sys.getsizeof', broken down by model layer
+        ("KeyChain", "Group", "Key", "_URLList", "_UserDict" and "User")
+        and by group. Objects shared by several owners count once. Caches,
+        e.g. digests and snapshots, are included.
+        """
+        return memory_report(self)
+
+    @_writer
+    def wipe(self) -> "KeyChain":
+        """
+        Zero every password in place, deleted users included, before the
+        keychain is discarded, e.g. when an agent locks.
+        """
+        for _key in self.get_all_keys(valid_only=False):
+            for _user in _key.user_dict.values():
+                _user.wipe()
+        return self
+
     @property
+    @_reader
     def register(self) -> Counter:
         list_: List[str] = []
         for _group in self.data.values():
@@ -176,6 +794,7 @@ class KeyChain(UserDict):
         return Counter(list_)
 
     @property
+    @_reader
     def doppelganger(self) -> Dict[str, List[Key]]:
         dict_: Dict[str, List[Key]] = {}
         for _keyname, _count in self.register.items():
@@ -183,6 +802,7 @@ class KeyChain(UserDict):
                 dict_[_keyname] = self.get_key(_keyname, keyname_only=True)
         return dict_
 
+    @_reader
     def asdict(self, *, valid_only: bool = True) -> dict:
         dict_ = {}
         list_: List[Group] = []
@@ -196,6 +816,7 @@ class KeyChain(UserDict):
 
     export: Callable = asdict
 
+    @_reader
     def dump_csv(
         self,
         path: Union[Path, str],
@@ -211,7 +832,7 @@ class KeyChain(UserDict):
             writer = csv.writer(f)
             writer.writerow(("name", "url", "username", "password"))
             for _key in self.get_all_keys(valid_only=valid_only):
-                if _key.url_list[0] is not None:
+                if _key.url_list:
                     _url = _key.url_list[0]  # Discard the rest.
                 else:
                     _url = _key.keyname  # May not be recognized.
@@ -234,7 +855,8 @@ class KeyChain(UserDict):
         dict_: Dict[str, Key] = {}
         with open(path, encoding="utf-8", newline="") as f:
             reader = csv.reader(f)
-            next(reader)
+            if next(reader, None) is None:  # Empty, not even a header.
+                return cls()
             for _keyname, _url, _username, _password in reader:
                 _user = User(_username, _password)
                 if _keyname not in dict_:
@@ -245,6 +867,7 @@ class KeyChain(UserDict):
                     _key.add_user(_user)
         return cls(Group(group, *dict_.values()))
 
+    @_metrics.timed("keychain.to_json")
     def to_json(self, *, valid_only: bool = True) -> str:
         """
         Should never save a json string before encrypted.
@@ -253,51 +876,35 @@ class KeyChain(UserDict):
         return json.dumps(dict_, ensure_ascii=False, indent=4)
 
     @classmethod
-    def from_json(cls, string_: str) -> "KeyChain":
+    @_metrics.timed("keychain.from_json")
+    def from_json(
+        cls,
+        string_: Union[str, bytes, bytearray]
+    ) -> "KeyChain":
+        """
+        Also from UTF-8 encoded bytes, e.g. a buffer to be wiped after.
+        """
         keychain_dict: dict = json.loads(string_)
         instance = cls()
         for i, j in keychain_dict.items():
             _groupname: str = i
-            _group_dict: dict = j
-            _group = Group(_groupname)
-            for i, j in _group_dict.items():
-                _keyname: str = i
-                _key_dict: dict = j
-                _key = Key(
-                    _keyname,
-                    description=_key_dict["description"],
-                    url_list=_key_dict["url"],
-                )
-                for i in _key_dict["userlist"]:
-                    _user_dict: dict = i
-                    _user = User(
-                        _user_dict["username"],
-                        _user_dict["password"],
-                        _user_dict["notes"]
-                    )
-                    _user.timestamp = _user_dict["timestamp"]
-                    _key.add_user(_user)
-                _group.add_key(_key)
+            _group = Group.from_pair(Pair(_groupname, j))
             instance.data[_groupname] = _group
+            _group._adopt(instance)
         return instance
 
+    @_reader
     def __repr__(self) -> str:
-        CLASSNAME = self.__class__.__name__
-        valid_groups = self.valid_groups
-        if not valid_groups:
-            repr_ = (f"{CLASSNAME}(__empty__)")
-        elif len(valid_groups) <= 4:
-            repr_ = (
-                f"{CLASSNAME}("
-                f"{TAB_}"
-                f"{SEP_.join(indent(repr(i)) for i in valid_groups)}\n)"
-            )
-        else:
-            repr_ = (
-                f"{CLASSNAME}("
-                f"{TAB_}{indent(repr(valid_groups[0]))}"
-                f"{SEP_}{indent(repr(valid_groups[1]))}"
-                f"{SEP_}..."
-                f"{SEP_}{indent(repr(valid_groups[-1]))}\n)"
-            )
-        return repr_
+        list_: List[str] = []
+        render_keychain(self, list_)
+        return "".join(list_)
+
+    @_reader
+    def render(self, offset: int = 0, limit: Optional[int] = None) -> str:
+        """
+        Page through valid keys ordered by groupname and keyname, e.g.
+        'render(100, 50)' renders the 101st to 150th keys in full.
+        """
+        list_: List[str] = []
+        render_keychain(self, list_, offset=offset, limit=limit)
+        return "".join(list_)
@@ -0,0 +1,118 @@
+"""
+Deep memory footprint of a 'KeyChain', by 'sys.getsizeof'.
+
+Every object is counted once, by id, under the innermost model layer
+reaching it first, i.e. a 'str' held by a 'User' counts as "User", while
+'Key' itself only counts its own attributes. Upward links to owners are
+not followed, so that a group never counts its keychain.
+"""
+import sys
+from collections import deque
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Set
+
+from .group import Group
+from .key import Key, _URLList, _UserDict
+from .node import Node
+from .user import User
+
+if TYPE_CHECKING:
+    from .keychain import KeyChain
+
+__all__ = ["memory_report"]
+
+LAYERS = ("KeyChain", "Group", "Key", "_URLList", "_UserDict", "User")
+
+_OWNER = "_Node__owner"
+
+# Values of these types hold no references worth following.
+_ATOMS = (str, bytes, int, float, bool, complex, type(None), type)
+
+
+class _MemoryReport(NamedTuple):
+    total: int  # bytes
+    objects: int
+    layers: Dict[str, int]  # layer -> bytes
+    groups: Dict[str, int]  # groupname -> bytes, including its keys
+
+    def format(self) -> str:
+        list_: List[str] = [
+            f"{'total':<24}{self.total:>14,} bytes"
+            f"{self.objects:>12,} objects"
+        ]
+        for _layer in LAYERS:
+            list_.append(f"{_layer:<24}{self.layers.get(_layer, 0):>14,}")
+        for _groupname in sorted(self.groups, key=self.groups.__getitem__,
+                                 reverse=True):
+            list_.append(f"{_groupname:<24}{self.groups[_groupname]:>14,}")
+        return "\n".join(list_)
+
+
+def _layer(obj: Any) -> str:
+    if isinstance(obj, User):
+        return "User"
+    if isinstance(obj, _UserDict):
+        return "_UserDict"
+    if isinstance(obj, _URLList):
+        return "_URLList"
+    if isinstance(obj, Key):
+        return "Key"
+    if isinstance(obj, Group):
+        return "Group"
+    return "KeyChain"
+
+
+def _children(obj: Any) -> Iterator[Any]:
+    if isinstance(obj, (dict, MappingProxyType)):
+        for i, j in obj.items():
+            if i == _OWNER:
+                continue  # Never climb up to the owner.
+            yield i
+            yield j
+        return
+    if isinstance(obj, (list, tuple, set, frozenset, deque)):
+        yield from obj
+        return
+    dict_ = getattr(obj, "__dict__", None)
+    if isinstance(dict_, dict):
+        yield dict_
+    for _name in getattr(type(obj), "__slots__", ()):
+        if _name.startswith("__") and not _name.endswith("__"):
+            _name = f"_{type(obj).__name__}{_name}"  # Name mangling.
+        if hasattr(obj, _name):
+            yield getattr(obj, _name)
+
+
+class _Walker:
+
+    def __init__(self) -> None:
+        self.seen: Set[int] = set()
+        self.layers: Dict[str, int] = dict.fromkeys(LAYERS, 0)
+
+    def walk(self, obj: Any, layer: str) -> int:
+        """Return bytes newly counted under 'obj'."""
+        total = 0
+        stack = [(obj, layer)]
+        while stack:
+            _obj, _layer_ = stack.pop()
+            if id(_obj) in self.seen or callable(_obj):
+                continue
+            self.seen.add(id(_obj))
+            if isinstance(_obj, Node):
+                _layer_ = _layer(_obj)
+            _size = sys.getsizeof(_obj)
+            self.layers[_layer_] += _size
+            total += _size
+            if not isinstance(_obj, _ATOMS):
+                for _child in _children(_obj):
+                    stack.append((_child, _layer_))
+        return total
+
+
+def memory_report(keychain: "KeyChain") -> _MemoryReport:
+    walker = _Walker()
+    groups: Dict[str, int] = {}
+    for _groupname, _group in keychain.data.items():
+        groups[_groupname] = walker.walk(_group, "Group")
+    total = sum(groups.values()) + walker.walk(keychain, "KeyChain")
+    return _MemoryReport(total, len(walker.seen), walker.layers, groups)
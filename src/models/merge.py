@@ -0,0 +1,150 @@
+"""
+Three-way merge of 'Group', 'Key' and 'User'.
+
+Subtrees with the same digest on both sides, or unchanged on one side
+compared with base, are taken as a whole without descending. Results are
+always fresh copies made from exports, never objects of the inputs.
+"""
+from typing import Callable, Dict, List, Optional, Set, TypeVar
+
+from .group import Group
+from .key import Key
+from .user import User
+
+__all__ = ["merge_group", "merge_key", "merge_user"]
+
+T = TypeVar("T", Group, Key, User)
+
+
+def _valid(object_: Optional[T]) -> Optional[T]:
+    if object_ is None or not object_.valid:
+        return None
+    return object_
+
+
+def _pick(
+    base: Optional[T],
+    ours: Optional[T],
+    theirs: Optional[T],
+    digest: Callable[[T], object]
+) -> List[Optional[T]]:
+    """
+    Return [winner] if at most one side changed, otherwise [].
+    """
+    _base = None if base is None else digest(base)
+    _ours = None if ours is None else digest(ours)
+    _theirs = None if theirs is None else digest(theirs)
+    if _ours == _theirs or _theirs == _base:
+        return [ours]
+    if _ours == _base:
+        return [theirs]
+    return []
+
+
+def merge_user(
+    base: Optional[User],
+    ours: Optional[User],
+    theirs: Optional[User]
+) -> Optional[User]:
+    """
+    On conflict, the user with the latest timestamp wins, and a modified
+    user wins over a deleted one.
+    """
+    base, ours, theirs = _valid(base), _valid(ours), _valid(theirs)
+    list_ = _pick(base, ours, theirs, lambda x: x.asdict())
+    if list_:
+        winner = list_[0]
+    elif ours is None or theirs is None:
+        winner = ours or theirs
+    elif theirs.timestamp > ours.timestamp:
+        winner = theirs
+    else:
+        winner = ours
+    if winner is None:
+        return None
+    export = winner.asdict()
+    assert export is not None
+    return User.from_dict(export)
+
+
+def merge_key(
+    base: Optional[Key],
+    ours: Optional[Key],
+    theirs: Optional[Key]
+) -> Optional[Key]:
+    """
+    On conflict, description follows ours, urls removed on either side are
+    removed, and users are merged one by one.
+    """
+    base, ours, theirs = _valid(base), _valid(ours), _valid(theirs)
+    list_ = _pick(base, ours, theirs, lambda x: x.digest)
+    if not list_ and (ours is None or theirs is None):
+        list_ = [ours or theirs]
+    if list_:
+        winner = list_[0]
+        if winner is None:
+            return None
+        _pair = winner.aspair()
+        assert _pair is not None
+        return Key.from_pair(_pair)
+    assert ours is not None and theirs is not None
+    description = ours.description
+    if base is not None and ours.description == base.description:
+        description = theirs.description
+    base_urls: Set[str] = set() if base is None else {*base.url_list}
+    ours_urls = {*ours.url_list}
+    theirs_urls = {*theirs.url_list}
+    urls = (ours_urls | theirs_urls) - (
+        (base_urls - ours_urls) | (base_urls - theirs_urls)
+    )
+    key = Key(ours.keyname, description=description, url_list=urls)
+    users: Dict[str, None] = {}
+    for _object in (base, ours, theirs):
+        if _object is not None:
+            users.update(dict.fromkeys(_object.user_dict))
+    for _username in users:
+        _user = merge_user(
+            None if base is None else base.user_dict.get(_username),
+            ours.user_dict.get(_username),
+            theirs.user_dict.get(_username)
+        )
+        if _user is not None:
+            key.add_user(_user)
+    return key
+
+
+def merge_group(
+    base: Optional[Group],
+    ours: Optional[Group],
+    theirs: Optional[Group]
+) -> Optional[Group]:
+    """
+    On conflict, a modified group wins over a deleted one, otherwise keys
+    are merged one by one.
+    """
+    base, ours, theirs = _valid(base), _valid(ours), _valid(theirs)
+    list_ = _pick(base, ours, theirs, lambda x: x.digest)
+    if not list_ and (ours is None or theirs is None):
+        list_ = [ours or theirs]
+    if list_:
+        winner = list_[0]
+        if winner is None:
+            return None
+        _pair = winner.aspair()
+        assert _pair is not None
+        return Group.from_pair(_pair)
+    assert ours is not None and theirs is not None
+    group = Group(ours.groupname)
+    keys: Dict[str, None] = {}
+    for _object in (base, ours, theirs):
+        if _object is not None:
+            keys.update(dict.fromkeys(_object))
+    for _keyname in keys:
+        _key = merge_key(
+            None if base is None else base.get(_keyname),
+            ours.get(_keyname),
+            theirs.get(_keyname)
+        )
+        if _key is not None:
+            group.add_key(_key)
+    return group
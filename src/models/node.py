@@ -0,0 +1,51 @@
+from typing import Optional
+
+
+class Node:
+    """
+    Upward link from a model object to the container holding it, through
+    which a mutation invalidates cached derived state of all ancestors.
+
+    Warning:
+        - an object held by multiple containers only links to the last one.
+        - copies and unpickled objects are not linked to any container.
+    """
+
+    def _adopt(self, owner: Optional["Node"]) -> None:
+        # Bypass '__setattr__' of subclasses, which reject unknown names.
+        object.__setattr__(self, "_Node__owner", owner)
+
+    def _adopt_children(self) -> None:
+        """Link all children to self. Override in containers."""
+
+    def _owner(self) -> Optional["Node"]:
+        return self.__dict__.get("_Node__owner")
+
+    def _invalidate(self) -> None:
+        """Drop cached derived state of self only. Override if any."""
+
+    def _touched(self, origin: "Node") -> None:
+        """
+        Called on the root of the chain, once all are invalidated, after a
+        mutation of 'origin', for state maintained incrementally. Override
+        if any.
+        """
+
+    def _touch(self) -> None:
+        node: Node = self
+        while True:
+            node._invalidate()
+            owner = node.__dict__.get("_Node__owner")
+            if owner is None:
+                break
+            node = owner
+        node._touched(self)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_Node__owner", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._adopt_children()
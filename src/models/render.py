@@ -0,0 +1,188 @@
+"""
+One-pass rendering of 'User', 'Key', 'Group' and 'KeyChain'.
+
+Every object writes its lines straight into a shared list buffer, with
+the indentation of the enclosing containers passed down as 'pad', rather
+than rendering nested strings and reflowing them with 'utils.indent' at
+every level. Containers only pick what is displayed, i.e. the first two
+and the last of valid items, by 'heapq' instead of sorting all of them.
+"""
+from heapq import nlargest, nsmallest
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from typing import (TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple,
+                    TypeVar)
+
+from ..utils import Char
+
+if TYPE_CHECKING:
+    from .group import Group
+    from .key import Key
+    from .keychain import KeyChain
+    from .user import User
+
+__all__ = ["page", "render_group", "render_key", "render_keychain",
+           "render_user"]
+
+T = TypeVar("T")
+
+INDENT: str = Char.INDENT.value
+
+_by_username: Callable = attrgetter("username")
+_by_keyname: Callable = attrgetter("keyname")
+_by_groupname: Callable = attrgetter("groupname")
+
+
+def _by_pairname(pair: Tuple[str, "Key"]) -> Tuple[str, str]:
+    return pair[0], pair[1].keyname
+
+
+def _preview(
+    items: Iterable[T],
+    key: Callable
+) -> Tuple[List[T], Optional[T]]:
+    """
+    Return all items sorted if there are at most 4, otherwise the first
+    two and the last one. O(n) for any n.
+    """
+    list_: List[T] = [*items]
+    if len(list_) <= 4:
+        return sorted(list_, key=key), None
+    return nsmallest(2, list_, key=key), nlargest(1, list_, key=key)[0]
+
+
+def page(
+    items: Iterable[T],
+    key: Callable,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> List[T]:
+    """
+    Return 'sorted(items, key=key)[offset:offset + limit]' with a bounded
+    heap instead of a full sort.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError
+    if limit is None:
+        return sorted(items, key=key)[offset:]
+    return nsmallest(offset + limit, items, key=key)[offset:]
+
+
+def render_user(user: "User", out: List[str], pad: str = "") -> None:
+    CLASSNAME = user.__class__.__name__
+    if not user.valid:
+        out.append(f"{CLASSNAME}(__deleted__)")
+        return
+    tab = Char.NEWLINE.value + pad + INDENT
+    sep = Char.DELIMITER.value + tab
+    out.append(
+        f"{CLASSNAME}("
+        f"{tab}username: '{user.username}'"
+        f"{sep}password: '{user.password}'"
+        f"{sep}timestamp: {user.timestamp}\n{pad})"
+    )
+
+
+def render_key(key: "Key", out: List[str], pad: str = "") -> None:
+    CLASSNAME = key.__class__.__name__
+    if not key.valid:
+        out.append(f"{CLASSNAME}(__deleted__)")
+        return
+    tab = Char.NEWLINE.value + pad + INDENT
+    sep = Char.DELIMITER.value + tab
+    out.append(f"{CLASSNAME}({tab}keyname: '{key.keyname}'{sep}userlist: [")
+    users = (i for i in key.user_dict.values() if i.valid)
+    head, last = _preview(users, _by_username)
+    if not head:
+        out.append(f"]\n{pad})")
+        return
+    tab_ = tab + INDENT
+    sep_ = sep + INDENT
+    out.append(tab_)
+    for _index, _user in enumerate(head):
+        if _index:
+            out.append(sep_)
+        render_user(_user, out, pad + INDENT * 2)
+    if last is not None:
+        out.append(f"{sep_}...{sep_}")
+        render_user(last, out, pad + INDENT * 2)
+    out.append(f"{tab}]\n{pad})")
+
+
+def render_group(group: "Group", out: List[str], pad: str = "") -> None:
+    if not group.valid:
+        out.append(f"{group.groupname}(__deleted__)")
+        return
+    keys = (i for i in group.data.values() if i.valid)
+    head, last = _preview(keys, _by_keyname)
+    _render_container(group.groupname, head, last, render_key, out, pad)
+
+
+def render_keychain(
+    keychain: "KeyChain",
+    out: List[str],
+    pad: str = "",
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> None:
+    """
+    Without 'offset' and 'limit', same layout as 'Group'. Otherwise, valid
+    keys are ordered by groupname and keyname, and only those in the given
+    page are rendered in full, under their groups.
+    """
+    CLASSNAME = keychain.__class__.__name__
+    groups = [i for i in keychain.data.values() if i.valid]
+    if not offset and limit is None:
+        head, last = _preview(groups, _by_groupname)
+        if not head:
+            out.append(f"{CLASSNAME}(__empty__)")
+            return
+        _render_container(CLASSNAME, head, last, render_group, out, pad)
+        return
+    pairs = (
+        (_group.groupname, _key)
+        for _group in groups
+        for _key in _group.data.values() if _key.valid
+    )
+    list_ = page(pairs, _by_pairname, offset, limit)
+    if not list_:
+        out.append(f"{CLASSNAME}(__empty__)")
+        return
+    tab = Char.NEWLINE.value + pad + INDENT
+    sep = Char.DELIMITER.value + tab
+    tab_ = tab + INDENT
+    sep_ = sep + INDENT
+    out.append(f"{CLASSNAME}(")
+    for _index, (_groupname, _pairs) in enumerate(
+        groupby(list_, itemgetter(0))
+    ):
+        out.append(f"{sep if _index else tab}{_groupname}(")
+        for _index_, (_, _key) in enumerate(_pairs):
+            out.append(sep_ if _index_ else tab_)
+            render_key(_key, out, pad + INDENT * 2)
+        out.append(f"{tab})")
+    out.append(f"\n{pad})")
+
+
+def _render_container(
+    name: str,
+    head: List,
+    last: Optional[object],
+    render: Callable,
+    out: List[str],
+    pad: str
+) -> None:
+    if not head:
+        out.append(f"{name}()")
+        return
+    tab = Char.NEWLINE.value + pad + INDENT
+    sep = Char.DELIMITER.value + tab
+    out.append(f"{name}({tab}")
+    for _index, _item in enumerate(head):
+        if _index:
+            out.append(sep)
+        render(_item, out, pad + INDENT)
+    if last is not None:
+        out.append(f"{sep}...{sep}")
+        render(last, out, pad + INDENT)
+    out.append(f"\n{pad})")
@@ -0,0 +1,127 @@
+"""
+Immutable images of valid 'User', 'Key', 'Group' and 'KeyChain'.
+
+Each model object caches its image until it or anything in it is mutated,
+so images of unchanged subtrees are shared between snapshots, and taking
+a snapshot after a mutation only rebuilds images along the changed path.
+"""
+import csv
+import json
+from pathlib import Path
+from types import MappingProxyType
+from typing import (Any, Dict, Iterator, List, Mapping, NamedTuple,
+                    Optional, Tuple, Union)
+
+__all__ = ["FrozenGroup", "FrozenKey", "FrozenUser", "Snapshot"]
+
+
+class FrozenUser(NamedTuple):
+    username: str
+    password: str
+    notes: Optional[str]
+    timestamp: Union[float, int]
+    history: Tuple[Tuple[str, Union[float, int]], ...]
+
+    @classmethod
+    def from_dict(cls, dict_: dict) -> "FrozenUser":
+        history = tuple((i, j) for i, j in dict_.get("history") or ())
+        return cls(
+            dict_["username"],
+            dict_["password"],
+            dict_["notes"],
+            dict_["timestamp"],
+            history
+        )
+
+    def asdict(self) -> dict:
+        dict_: Dict[str, Any] = {
+            "username": self.username,
+            "password": self.password,
+            "notes": self.notes,
+            "timestamp": self.timestamp
+        }
+        if self.history:
+            dict_["history"] = [[*i] for i in self.history]
+        return dict_
+
+
+class FrozenKey(NamedTuple):
+    keyname: str
+    group: Optional[str]
+    description: Optional[str]
+    url_list: Tuple[str, ...]
+    user_dict: Mapping[str, FrozenUser]
+
+    def asdict(self) -> dict:
+        return {
+            "description": self.description,
+            "url": [*self.url_list],
+            "userlist": [
+                self.user_dict[i].asdict() for i in sorted(self.user_dict)
+            ]
+        }
+
+
+class FrozenGroup(NamedTuple):
+    groupname: str
+    key_dict: Mapping[str, FrozenKey]
+
+    def asdict(self) -> dict:
+        return {i: self.key_dict[i].asdict() for i in sorted(self.key_dict)}
+
+
+class Snapshot(Mapping):
+    """
+    Read-only, consistent view of a 'KeyChain' at the time it is taken,
+    mapping groupnames to 'FrozenGroup'. Only valid objects are included.
+
+    Exports work like those of 'KeyChain' and can run while the keychain
+    keeps being mutated.
+    """
+
+    def __init__(self, group_dict: Mapping[str, FrozenGroup]) -> None:
+        self.__group_dict: Mapping[str, FrozenGroup] = MappingProxyType(
+            group_dict
+        )
+
+    def __getitem__(self, key: str) -> FrozenGroup:
+        return self.__group_dict[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__group_dict)
+
+    def __len__(self) -> int:
+        return len(self.__group_dict)
+
+    def get_all_keys(self) -> List[FrozenKey]:
+        list_: List[FrozenKey] = []
+        for _group in self.__group_dict.values():
+            list_.extend(_group.key_dict.values())
+        return list_
+
+    def asdict(self) -> dict:
+        return {
+            i: self.__group_dict[i].asdict() for i in sorted(self.__group_dict)
+        }
+
+    def to_json(self) -> str:
+        """
+        Should never save a json string before encrypted.
+        """
+        return json.dumps(self.asdict(), ensure_ascii=False, indent=4)
+
+    def dump_csv(self, path: Union[Path, str]) -> None:
+        """
+        Same as method 'KeyChain.dump_csv'.
+        """
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("name", "url", "username", "password"))
+            for _key in self.get_all_keys():
+                if _key.url_list:
+                    _url = _key.url_list[0]  # Discard the rest.
+                else:
+                    _url = _key.keyname  # May not be recognized.
+                for _user in _key.user_dict.values():
+                    row = (_key.keyname, _url, _user.username, _user.password)
+                    writer.writerow(row)
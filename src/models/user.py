@@ -1,18 +1,42 @@
-from typing import Callable, Optional, Union
+from collections import deque
+from typing import (Any, Callable, Deque, Dict, List, Optional, Tuple,
+                    Union)
 
-from ..utils import SEP_, TAB_, timestamp
+from ..utils import Secret, timestamp
+from .node import Node
+from .render import render_user
+from .snapshot import FrozenUser
 
 NoneType = type(None)
 
 
-class User:
+class User(Node):
+    """
+    Previous passwords are kept in a bounded history of at most
+    'HISTORY_SIZE' (password, timestamp) pairs, newest last.
+
+    History loaded from json is kept as is until accessed, then held as
+    'Secret's like the current password.
+
+    The current password is held as a 'Secret', moved to history when
+    replaced. Each is wiped when evicted, discarded or by method 'wipe'.
+    Property 'password' decodes a new 'str' on every access.
+    """
+
+    HISTORY_SIZE: int = 8
+
+    __secret: Secret  # Set by method '__replace' only.
 
     def __init__(
         self,
         username: str,
         password: str,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        *,
+        history: Optional[list] = None
     ) -> None:
+        self.__history: Union[Deque[Tuple[Secret, Union[float, int]]],
+                              list, NoneType] = history
         self.username: str = username
         self.password: str = password
         self.notes: Optional[str] = notes
@@ -28,6 +52,8 @@ class User:
         if __name in ("username", "password"):
             if not isinstance(__value, str):
                 raise TypeError
+            if __name == "password":
+                return super().__setattr__(__name, __value)
             super().__setattr__("timestamp", timestamp())
         elif __name == "notes":
             if __value is not None and not isinstance(__value, str):
@@ -38,9 +64,16 @@ class User:
         elif __name == f"_{CLASSNAME}__deleted":
             if not isinstance(__value, bool):
                 raise TypeError
+        elif __name == f"_{CLASSNAME}__history":
+            if __value is not None and not isinstance(__value, (deque, list)):
+                raise TypeError
+        elif __name == f"_{CLASSNAME}__frozen":
+            # Cache only, not a mutation.
+            return super().__setattr__(__name, __value)
         else:
             raise AttributeError
-        return super().__setattr__(__name, __value)
+        super().__setattr__(__name, __value)
+        self._touch()
 
     def __lt__(self, __o: "User") -> bool:
         """For 'bisect.insort' only."""
@@ -52,6 +85,122 @@ class User:
     def valid(self) -> bool:
         return not self.__deleted
 
+    @property
+    def password(self) -> str:
+        return self.__secret.reveal()
+
+    @password.setter
+    def password(self, password: str) -> None:
+        self.__replace(password, timestamp(), push=True)
+
+    @property
+    def secret(self) -> Secret:
+        return self.__secret
+
+    def __replace(
+        self,
+        password: Union[str, Secret],
+        timestamp_: Union[float, int],
+        *,
+        push: bool = False
+    ) -> None:
+        """
+        Set the password, moving the previous one to history if 'push',
+        otherwise wiping it.
+        """
+        previous: Optional[Secret] = getattr(self, "_User__secret", None)
+        if previous is not None and push:
+            self.__push(previous)
+        if not isinstance(password, Secret):
+            password = Secret(password)
+        super().__setattr__("_User__secret", password)
+        super().__setattr__("timestamp", timestamp_)
+        if previous is not None and not push:
+            previous.wipe()
+        self._touch()
+
+    def wipe(self) -> "User":
+        """
+        Zero the password and history in place, then drop history. Only for
+        a user about to be discarded, e.g. on lock, since the password is
+        then empty.
+        """
+        self.__secret.wipe()
+        if isinstance(self.__history, deque):
+            for _secret, _ in self.__history:
+                _secret.wipe()
+        super().__setattr__("_User__history", None)
+        self._touch()
+        return self
+
+    def rotate(self, password: str, timestamp_: Union[float, int]) -> "User":
+        """
+        Set 'password' with the given timestamp instead of the current time,
+        so that a batch of updates can share one timestamp.
+        """
+        if not isinstance(password, str):
+            raise TypeError
+        if not isinstance(timestamp_, (float, int)):
+            raise TypeError
+        self.__replace(password, timestamp_, push=True)
+        return self
+
+    @property
+    def history(self) -> Deque[Tuple[Secret, Union[float, int]]]:
+        if not isinstance(self.__history, deque):
+            deque_: Deque[Tuple[Secret, Union[float, int]]] = deque(
+                maxlen=self.HISTORY_SIZE
+            )
+            for _password, _timestamp in self.__history or ():
+                if not isinstance(_password, str):
+                    raise TypeError
+                if not isinstance(_timestamp, (float, int)):
+                    raise TypeError
+                deque_.append((Secret(_password), _timestamp))
+            self.__history = deque_
+        return self.__history
+
+    def __push(self, secret: Secret) -> None:
+        history = self.history
+        # A full deque silently evicts the oldest on append, so wipe first.
+        if len(history) == history.maxlen:
+            if not history:
+                return secret.wipe()
+            history.popleft()[0].wipe()
+        history.append((secret, self.timestamp))
+
+    def rollback(self) -> "User":
+        """
+        Restore the latest previous password, which is then removed from
+        history. The current password is discarded.
+
+        Raise ValueError if history is empty.
+        """
+        if not self.history:
+            raise ValueError("no history to roll back")
+        _secret, _ = self.history.pop()
+        self.__replace(_secret, timestamp())
+        return self
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        # Caches only, and images hold unpicklable 'MappingProxyType'.
+        state[f"_{self.__class__.__name__}__frozen"] = None
+        return state
+
+    def _invalidate(self) -> None:
+        self.__frozen: Optional[FrozenUser] = None
+
+    def _freeze(self) -> Optional[FrozenUser]:
+        """Immutable image, or None if invalid."""
+        if self.__deleted:
+            return None
+        if self.__frozen is None:
+            export = self.asdict()
+            assert export is not None
+            self.__frozen = FrozenUser.from_dict(export)
+        return self.__frozen
+
     def delete(self) -> "User":
         self.__deleted = True
         return self
@@ -64,25 +213,37 @@ class User:
         if self.__deleted and valid_only:
             return None
         else:
-            dict_ = {
+            dict_: Dict[str, Any] = {
                 "username": self.username,
                 "password": self.password,
                 "notes": self.notes,
                 "timestamp": self.timestamp
             }
+            if isinstance(self.__history, deque):
+                list_: List[list] = [
+                    [i.reveal(), j] for i, j in self.__history
+                ]
+                if list_:
+                    dict_["history"] = list_
+            elif self.__history:
+                dict_["history"] = [[*i] for i in self.__history]
             return dict_
 
     export: Callable = asdict
 
+    @classmethod
+    def from_dict(cls, dict_: dict) -> "User":
+        """Inverse of method 'asdict'."""
+        instance = cls(
+            dict_["username"],
+            dict_["password"],
+            dict_["notes"],
+            history=dict_.get("history")
+        )
+        instance.timestamp = dict_["timestamp"]
+        return instance
+
     def __repr__(self) -> str:
-        CLASSNAME = self.__class__.__name__
-        if self.__deleted:
-            return f"{CLASSNAME}(__deleted__)"
-        else:
-            repr_ = (
-                f"{CLASSNAME}("
-                f"{TAB_}username: '{self.username}'"
-                f"{SEP_}password: '{self.password}'"
-                f"{SEP_}timestamp: {self.timestamp}\n)"
-            )
-            return repr_
+        list_: List[str] = []
+        render_user(self, list_)
+        return "".join(list_)
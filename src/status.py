@@ -5,6 +5,18 @@ class Status(Enum):
 
     SUCCESS = "success."
     GENERATE_SUCCESS = "success: '{password}' has been copied to the clipboard."
+    IMPORT_SUCCESS = "success: {count} keys have been imported."
+    COPY_SUCCESS = (
+        "success: password of '{username}' for '{keyname}' "
+        "has been copied to the clipboard."
+    )
     FORMAT_ERROR = "error: unknown format."
+    INTEGRITY_ERROR = "error: file is corrupted."
+    CONFLICT_ERROR = "error: file has been modified by another process."
     PASSWORD_ERROR = "error: incorrect username or password."
     VALUE_ERROR = "error: invalid argument."
+    FILE_ERROR = "error: cannot access file."
+    NOT_FOUND = "error: no such key."
+    LOCKED = "error: agent is locked."
+    AGENT_ERROR = "error: agent is not running."
+    SOCKET_ERROR = "error: socket path is in use."
@@ -0,0 +1,188 @@
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .io_ import IO
+from .models import Group, KeyChain
+from .models.keychain import _Change
+from .models.merge import merge_group, merge_key
+from .status import Status
+
+
+def _copy(group: Optional[Group]) -> Optional[Group]:
+    if group is None or not group.valid:
+        return None
+    _pair = group.aspair()
+    assert _pair is not None
+    return Group.from_pair(_pair)
+
+
+def _put(keychain: KeyChain, groupname: str, group: Optional[Group]) -> None:
+    if group is not None:
+        keychain[groupname] = group
+    elif groupname in keychain:
+        keychain[groupname].delete()
+
+
+class Sync:
+    """
+    Keep replicas of a vault, e.g. in a mounted home, a backup directory
+    and a shared volume, in sync with an in-memory 'KeyChain'.
+
+    Replicas are watched by polling 'os.stat' mtimes. When one changes,
+    only groups and keys that differ from the last synced state are merged
+    into the keychain, by three-way merge, and then every replica out of
+    date is written once.
+
+    A replica which cannot be read, e.g. written with other credentials,
+    is never written to, so that it is not lost. Its status is kept in
+    'failures' until it is read successfully after its next change.
+
+    Parameters
+    ----------
+    keychain: KeyChain
+        Mutated in place. Local changes are written out on next poll.
+
+    replicas: IO
+        All with the same credentials.
+    """
+
+    def __init__(
+        self,
+        keychain: KeyChain,
+        *replicas: IO,
+        interval: float = 1.0
+    ) -> None:
+        self.keychain: KeyChain = keychain
+        self.replicas: List[IO] = [*replicas]
+        self.interval: float = interval
+        self.__base: KeyChain = KeyChain.from_json(keychain.to_json())
+        self.__mtimes: Dict[Path, int] = {}
+        # Signed roots in headers, and digests of content, of replicas.
+        self.__roots: Dict[Path, Optional[str]] = {}
+        self.__digests: Dict[Path, str] = {}
+        self.__failures: Dict[Path, Status] = {}
+
+    @property
+    def failures(self) -> Dict[Path, Status]:
+        """Status of each replica failing to be read, by path."""
+        return dict(self.__failures)
+
+    @staticmethod
+    def __mtime(io: IO) -> Optional[int]:
+        try:
+            return io.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def __pull(self, io: IO) -> List[_Change]:
+        try:
+            header = io.read_header()
+            root = None if header is None else header.fields.get("root")
+            if root is not None and root == self.__roots.get(io.path):
+                return []
+            result = io.read()
+        except OSError:
+            self.__failures[io.path] = Status.FILE_ERROR
+            return []
+        if result.status != Status.SUCCESS or result.keychain is None:
+            self.__failures[io.path] = result.status
+            return []
+        self.__failures.pop(io.path, None)
+        remote = result.keychain
+        self.__roots[io.path] = root
+        self.__digests[io.path] = remote.digest
+        changes = self.__base.diff(remote)
+        with self.keychain.writing():
+            self.__merge(remote, changes)
+        return changes
+
+    def __merge(self, remote: KeyChain, changes: List[_Change]) -> None:
+        for _change in changes:
+            _groupname = _change.groupname
+            _base = self.__base.get(_groupname)
+            _local = self.keychain.get(_groupname)
+            _remote = remote.get(_groupname)
+            if _change.keyname is None:
+                _put(self.keychain, _groupname, merge_group(
+                    _base, _local, _remote
+                ))
+                continue
+            _keyname = _change.keyname
+            _key = merge_key(
+                None if _base is None else _base.get(_keyname),
+                None if _local is None else _local.get(_keyname),
+                None if _remote is None else _remote.get(_keyname)
+            )
+            if _key is not None:
+                if _local is None or not _local.valid:
+                    self.keychain[_groupname] = Group(_groupname, _key)
+                else:
+                    _local[_keyname] = _key
+            elif _local is not None and _keyname in _local:
+                _local[_keyname].delete()
+
+    def __push(self) -> None:
+        digest = self.keychain.digest
+        for _io in self.replicas:
+            if _io.path in self.__failures:
+                continue
+            if self.__digests.get(_io.path) == digest:
+                continue
+            if _io.write(self.keychain).status != Status.SUCCESS:
+                continue
+            header = _io.read_header()
+            self.__roots[_io.path] = None if header is None else (
+                header.fields.get("root")
+            )
+            self.__digests[_io.path] = digest
+            mtime = self.__mtime(_io)
+            if mtime is not None:
+                self.__mtimes[_io.path] = mtime
+        with self.keychain.reading():
+            for _change in self.__base.diff(self.keychain):
+                _groupname = _change.groupname
+                _put(self.__base, _groupname, _copy(
+                    self.keychain.get(_groupname)
+                ))
+
+    def poll_once(self) -> List[_Change]:
+        """
+        Merge changed replicas into the keychain, then write replicas out of
+        date. Return the changes merged from replicas.
+        """
+        changes: List[_Change] = []
+        stale = False
+        for _io in self.replicas:
+            mtime = self.__mtime(_io)
+            if mtime is None:
+                stale = True
+                continue
+            if self.__mtimes.get(_io.path) == mtime:
+                continue
+            self.__mtimes[_io.path] = mtime
+            changes.extend(self.__pull(_io))
+            stale = True
+        if stale or self.__base.digest != self.keychain.digest:
+            self.__push()
+        return changes
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Poll until 'stop' is set. Blocking file operations run in the
+        default executor, hence polls merge into the keychain from another
+        thread. Thread-safe mode of the keychain is turned on if off, see
+        method 'KeyChain.set_thread_safe', and merges hold its write lock.
+        """
+        if not self.keychain.thread_safe:
+            self.keychain.set_thread_safe()
+        loop = asyncio.get_running_loop()
+        while stop is None or not stop.is_set():
+            await loop.run_in_executor(None, self.poll_once)
+            if stop is None:
+                await asyncio.sleep(self.interval)
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
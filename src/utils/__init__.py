@@ -1,4 +1,7 @@
 from .char import SEP_, SEP__, TAB_, TAB__, Char
+from .entropy import estimate_entropy
 from .indent import indent
 from .printer import Printer
+from .rwlock import RWLock
+from .secret import Secret
 from .time_ import fromisoformat, fromtimestamp, isoformat, timestamp
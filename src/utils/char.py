@@ -8,6 +8,7 @@ class Char(Enum):
     UPPERCASE = string.ascii_uppercase
     DIGITS = string.digits
     PUNCTUATION = string.punctuation
+    AMBIGUOUS = "Il1|O0o"
 
     SPACE = " "
     DELIMITER = ","
@@ -0,0 +1,34 @@
+import math
+
+from .char import Char
+
+
+def estimate_entropy(password: str) -> float:
+    """
+    Rough strength of a password in bits.
+
+    The pool size is the total volume of character classes present.
+    Repeated characters (e.g. 'aaa') and ascending or descending runs
+    (e.g. 'abc', '321') only count once.
+    """
+    if not password:
+        return 0.0
+    pool = 0
+    others = set()
+    for _class in (
+        Char.LOWERCASE.value,
+        Char.UPPERCASE.value,
+        Char.DIGITS.value,
+        Char.PUNCTUATION.value
+    ):
+        if any(i in _class for i in password):
+            pool += len(_class)
+    for i in password:
+        if not (i.isascii() and i.isprintable() and i != " "):
+            others.add(i)
+    pool += len(others) or (1 if " " in password else 0)
+    length = 1
+    for _prev, _char in zip(password, password[1:]):
+        if abs(ord(_char) - ord(_prev)) > 1:
+            length += 1
+    return length * math.log2(max(pool, 2))
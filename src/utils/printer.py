@@ -1,3 +1,8 @@
+import sys
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, TextIO
+
+
 class Printer:
     """
     Singleton class.
@@ -24,3 +29,45 @@ class Printer:
     def __call__(self, *args, force_print: bool = False, **kwargs):
         if not self.__quiet or force_print:
             print(*args, **kwargs)
+
+    def stream(
+        self,
+        items: Iterable,
+        format_: Callable[..., str] = str,
+        *,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        file: Optional[TextIO] = None,
+        force_print: bool = False
+    ) -> int:
+        """
+        Print one line per item, consuming 'items' lazily, and return the
+        number of lines printed.
+
+        At most 'limit' items are pulled from 'items' and formatted. Lines
+        are written to 'file' (defaults to 'sys.stdout') a page at a time,
+        and if 'page_size' is given and 'file' is a terminal, wait for
+        'Enter' between pages, or stop on 'q'.
+        """
+        if self.__quiet and not force_print:
+            return 0
+        if file is None:
+            file = sys.stdout
+        if limit is not None:
+            items = islice(items, limit)
+        interactive = page_size is not None and file.isatty()
+        size = page_size if page_size is not None else 256
+        count = 0
+        iterator = iter(items)
+        while True:
+            list_: List[str] = [format_(i) for i in islice(iterator, size)]
+            if not list_:
+                break
+            list_.append("")
+            file.write("\n".join(list_))
+            file.flush()
+            count += len(list_) - 1
+            if interactive and len(list_) > size:
+                if input("-- more --").strip().lower() == "q":
+                    break
+        return count
@@ -0,0 +1,83 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class RWLock:
+    """
+    Readers-writer lock. Readers do not block each other, while a writer
+    excludes everyone else. Waiting writers take precedence over new
+    readers, so that writers never starve.
+
+    Both locks are reentrant, and a thread holding the write lock may also
+    take the read lock. Upgrading from read to write raises RuntimeError
+    instead of deadlocking.
+    """
+
+    def __init__(self) -> None:
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers: Dict[int, int] = {}  # thread ident -> depth
+        self.__writer: Optional[int] = None
+        self.__depth: int = 0
+        self.__waiting: int = 0
+
+    def acquire_read(self) -> None:
+        ident = threading.get_ident()
+        with self.__condition:
+            if self.__writer == ident or ident in self.__readers:
+                self.__readers[ident] = self.__readers.get(ident, 0) + 1
+                return
+            while self.__writer is not None or self.__waiting:
+                self.__condition.wait()
+            self.__readers[ident] = 1
+
+    def release_read(self) -> None:
+        ident = threading.get_ident()
+        with self.__condition:
+            depth = self.__readers[ident] - 1
+            if depth:
+                self.__readers[ident] = depth
+                return
+            del self.__readers[ident]
+            if not self.__readers:
+                self.__condition.notify_all()
+
+    def acquire_write(self) -> None:
+        ident = threading.get_ident()
+        with self.__condition:
+            if self.__writer == ident:
+                self.__depth += 1
+                return
+            if ident in self.__readers:
+                raise RuntimeError("cannot upgrade a read lock")
+            self.__waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__waiting -= 1
+            self.__writer = ident
+            self.__depth = 1
+
+    def release_write(self) -> None:
+        with self.__condition:
+            self.__depth -= 1
+            if not self.__depth:
+                self.__writer = None
+                self.__condition.notify_all()
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
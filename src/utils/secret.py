@@ -0,0 +1,65 @@
+import hmac
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+
+class Secret:
+    """
+    UTF-8 encoded secret in a 'bytearray' owned by this object only, so
+    that it can be wiped in place, unlike 'str'.
+
+    Every 'reveal' returns a new 'str' which cannot be wiped, so prefer
+    'view' where bytes will do.
+    """
+
+    __slots__ = ("__buffer",)
+
+    def __init__(self, value: Union[str, bytes, bytearray] = "") -> None:
+        if isinstance(value, str):
+            self.__buffer: bytearray = bytearray(value.encode("utf-8"))
+        elif isinstance(value, (bytes, bytearray)):
+            self.__buffer = bytearray(value)
+        else:
+            raise TypeError
+
+    def reveal(self) -> str:
+        return self.__buffer.decode("utf-8")
+
+    @contextmanager
+    def view(self) -> Iterator[memoryview]:
+        """
+        Read-only view of the encoded secret, without copying, released on
+        exit, e.g. 'with secret.view() as view_: sha256(view_)'.
+        """
+        with memoryview(self.__buffer) as view_:
+            with view_.toreadonly() as readonly:
+                yield readonly
+
+    def wipe(self) -> None:
+        """
+        Overwrite with zeros in place, then drop the buffer. Idempotent,
+        and never fails even while a view is still held, which then only
+        sees zeros.
+        """
+        self.__buffer[:] = bytes(len(self.__buffer))
+        self.__buffer = bytearray()
+
+    @property
+    def wiped(self) -> bool:
+        return not self.__buffer
+
+    def __len__(self) -> int:
+        return len(self.__buffer)
+
+    def __eq__(self, __o: object) -> bool:
+        """In constant time."""
+        if isinstance(__o, Secret):
+            return hmac.compare_digest(self.__buffer, __o.__buffer)
+        if isinstance(__o, str):
+            return hmac.compare_digest(self.__buffer, __o.encode("utf-8"))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}('******')"